@@ -0,0 +1,41 @@
+from flask import jsonify, request, Blueprint
+from entities.article_index import article_index
+from lib.validation import token_required
+from exceptions.errors import InvalidRequestError
+from datetime import datetime
+
+article_bp = Blueprint("article", __name__)
+
+
+def _parse_date(name: str):
+    value = request.args.get(name)
+    if value is None:
+        return None
+
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise InvalidRequestError(f"{name} must be a date in YYYY-MM-DD format.")
+
+
+@article_bp.route("/search", methods=["GET"])
+@token_required
+def search_articles():
+    query = request.args.get("q", "").strip()
+    if not query:
+        raise InvalidRequestError("q must be a non-empty search query.")
+
+    limit = request.args.get("limit", default=20, type=int)
+    if limit > 50:
+        limit = 50
+
+    articles = article_index.search(
+        query,
+        ticker=request.args.get("ticker"),
+        date_from=_parse_date("from"),
+        date_to=_parse_date("to"),
+        sentiment=request.args.get("sentiment"),
+        limit=max(limit, 1),
+    )
+
+    return jsonify({"articles": articles}), 200
@@ -1,21 +1,56 @@
-from flask import jsonify, Blueprint
-from entities.company import Company, CompanyList
+from flask import jsonify, Blueprint, Response, request
+from entities.company import Company, company_catalog
 
 company_bp = Blueprint("company", __name__)
 
 
+def _catalog_response(full_data: bool):
+    catalog = company_catalog.get(full_data=full_data)
+
+    if "gzip" in request.accept_encodings:
+        response = Response(catalog.gzip_body, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(f"{catalog.etag}-gzip")
+    else:
+        response = Response(catalog.body, mimetype="application/json")
+        response.set_etag(catalog.etag)
+
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
 @company_bp.route("/all/full", methods=["GET"])
 def get_all_companies_full():
-    companies = CompanyList()
-
-    return jsonify(companies.get_all(full_data=True)), 200
+    return _catalog_response(full_data=True)
 
 
 @company_bp.route("/all/partial", methods=["GET"])
 def get_all_companies_partial():
-    companies = CompanyList()
+    return _catalog_response(full_data=False)
+
+
+@company_bp.route("/suggest", methods=["GET"])
+def suggest_companies():
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", default=10, type=int)
+
+    if limit > 50:
+        limit = 50
+
+    companies = company_catalog.index().suggest(query, limit=max(limit, 1))
 
-    return jsonify(companies.get_all(full_data=False)), 200
+    return jsonify(
+        [
+            {
+                "id": company.id,
+                "company_name": company.company_name,
+                "ticker": company.ticker,
+                "aliases": company.aliases,
+            }
+            for company in companies
+        ]
+    ), 200
 
 
 @company_bp.route("/search/<int:company_id>", methods=["GET"])
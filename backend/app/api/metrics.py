@@ -0,0 +1,11 @@
+from flask import jsonify, Blueprint
+from lib.metrics import collect_metrics
+from lib.validation import internal_token_required
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/", methods=["GET"])
+@internal_token_required
+def get_metrics():
+    return jsonify(collect_metrics()), 200
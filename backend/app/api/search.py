@@ -1,14 +1,17 @@
-from flask import jsonify, request, Blueprint, g
+from flask import jsonify, request, Blueprint, g, Response, stream_with_context
 from entities.search import Search
 from entities.company import Company
 from entities.user import User
-from lib.validation import token_required
+from entities.job import SearchJob
+from lib.validation import token_required, stream_token_required, create_stream_token
+from lib.progress import progress_broker, format_sse
 from exceptions.errors import (
-    SearchLimitError,
     InvalidRequestError,
     PermissionDeniedError,
 )
 from uuid import UUID
+import gzip
+import time
 
 search_bp = Blueprint("search", __name__)
 
@@ -19,9 +22,6 @@ def search_company():
     user_id = g.user["sub"]
     user = User.get_by_id(user_id=user_id)
 
-    if not user.can_perform_search():
-        raise SearchLimitError("Daily search limit reached.")
-
     ticker = request.json.get("ticker")
     days_ago = request.json.get("days_ago")
 
@@ -30,17 +30,92 @@ def search_company():
 
     company = Company.get_by_ticker(ticker=ticker)
 
-    search = user.create_search(ticker=company.ticker, days_ago=days_ago)
+    user.reserve_search()
+    try:
+        job = SearchJob.create(
+            user_id=user.id,
+            company_name=company.company_name,
+            ticker=company.ticker,
+            days_ago=days_ago,
+        )
+    except Exception:
+        user.release_search()
+        raise
+    job.enqueue()
 
-    json_output = {
-        "search_id": search.id,
-        "company_name": search.company_name,
-        "ticker": search.ticker,
-        "href": f"/search/{search.id}",
-        "created_at": search.created_at,
-    }
+    return _job_json(job), 202
+
+
+@search_bp.route("/job/<uuid:job_id>", methods=["GET"])
+@token_required
+def get_search_job(job_id: UUID):
+    user_id = g.user["sub"]
+    user = User.get_by_id(user_id=user_id)
+
+    job = SearchJob.get_by_id(job_id=job_id)
+
+    if not job.check_permission(user_id=user.id):
+        raise PermissionDeniedError(f"User {user.id} is unauthorized to view job {job.id}")
+
+    return _job_json(job), 200
+
+
+def _job_json(job: SearchJob):
+    job_data = job.to_json()
+    if job.status in ("queued", "running"):
+        stream_token = create_stream_token(job.user_id, f"job:{job.id}")
+        job_data["events_url"] = f"/api/search/job/{job.id}/events?token={stream_token}"
+    return job_data
+
+
+def _poll_job_events(job: SearchJob, interval: float = 1, keepalive: float = 15):
+    stage = None
+    last_sent = time.monotonic()
+    while True:
+        job.reload()
 
-    return json_output, 200
+        if job.status == "done":
+            yield {
+                "event": "done",
+                "data": {"search_id": str(job.search_id), "href": f"/search/{job.search_id}"},
+            }
+            return
+        if job.status == "failed":
+            yield {"event": "failed", "data": {"error": job.error}}
+            return
+
+        if job.stage is not None and job.stage != stage:
+            stage = job.stage
+            last_sent = time.monotonic()
+            yield {"event": "stage", "data": {"stage": stage}}
+        elif time.monotonic() - last_sent >= keepalive:
+            last_sent = time.monotonic()
+            yield None
+
+        time.sleep(interval)
+
+
+@search_bp.route("/job/<uuid:job_id>/events", methods=["GET"])
+@stream_token_required(lambda job_id: f"job:{job_id}")
+def stream_search_job_events(job_id: UUID):
+    user_id = g.user["sub"]
+    user = User.get_by_id(user_id=user_id)
+
+    job = SearchJob.get_by_id(job_id=job_id)
+
+    if not job.check_permission(user_id=user.id):
+        raise PermissionDeniedError(f"User {user.id} is unauthorized to view job {job.id}")
+
+    if progress_broker.get(str(job.id)) is not None:
+        events = progress_broker.subscribe(str(job.id))
+    else:
+        events = _poll_job_events(job)
+
+    return Response(
+        stream_with_context(format_sse(event) for event in events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @search_bp.route("/delete/<uuid:search_id>", methods=["DELETE"])
@@ -67,18 +142,22 @@ def get_search_by_id(search_id: UUID):
     user_id = g.user["sub"]
     user = User.get_by_id(user_id=user_id)
 
-    search = Search.get_by_id(search_id=search_id)
-    
-    if not search.check_permission(user_id=user.id):
-        raise PermissionDeniedError(f"User {user.id} is unauthorized to view search {search.id}")
-    
-    company = Company.get_by_ticker(ticker=search.ticker)
-    full_search_data = search.to_json()
-    full_search_data.update(
-        {"exchange": company.exchange, "currency": company.currency}
-    )
+    created_by, payload = Search.get_payload(search_id=search_id)
+
+    if created_by != user.id:
+        raise PermissionDeniedError(f"User {user.id} is unauthorized to view search {search_id}")
+
+    if "gzip" in request.accept_encodings:
+        response = Response(payload, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+        response.set_etag(f"{search_id}-gzip")
+    else:
+        response = Response(gzip.decompress(payload), mimetype="application/json")
+        response.set_etag(str(search_id))
 
-    return jsonify(full_search_data), 200
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Accept-Encoding, Authorization"
+    return response.make_conditional(request)
 
 
 @search_bp.route("/search_history", methods=["GET"])
@@ -87,15 +166,16 @@ def get_search_history():
     user_id = g.user["sub"]
     user = User.get_by_id(user_id=user_id)
 
-    page = request.args.get("page", default=1, type=int)
+    cursor = request.args.get("cursor")
     limit = request.args.get("limit", default=30, type=int)
 
     if limit > 50:
         limit = 50
 
-    paginated_search_history = user.get_search_history(page=page, limit=limit)
+    paginated_search_history = user.get_search_history(limit=max(limit, 1), cursor=cursor)
     searches = paginated_search_history["searches"]
     has_more = paginated_search_history["has_more"]
+    next_cursor = paginated_search_history["next_cursor"]
 
     search_content = {
         "label": "Search History",
@@ -109,7 +189,8 @@ def get_search_history():
             }
             for search in searches
         ],
-        "has_more": has_more
+        "has_more": has_more,
+        "next_cursor": next_cursor,
     }
 
     return jsonify(search_content), 200
@@ -3,7 +3,6 @@ from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 from models import db
-from supabase import create_client, Client
 
 load_dotenv(".env.local")
 
@@ -0,0 +1,318 @@
+from models import db, Analysis as AnalysisModel, AnalysisProgress as AnalysisProgressModel
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from uuid import UUID, uuid4
+from entities.article import ArticleCollection
+from lib.progress import progress_broker
+from exceptions import errors
+from exceptions.errors import NotFoundError, DBCommitError, ExternalAPIError
+from typing import Dict, Callable, Tuple
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import hashlib
+import os
+import threading
+import time
+
+load_dotenv(".env.local")
+
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", 900))
+ANALYSIS_FOLLOW_POLL_SECONDS = float(os.getenv("ANALYSIS_FOLLOW_POLL_SECONDS", 1))
+
+
+class AnalysisFlight:
+    def __init__(self):
+        self.channel_id: str = f"analysis:{uuid4()}"
+        self.result: "Analysis" = None
+        self.error: Exception = None
+
+
+_flights: Dict[Tuple[str, int, int], AnalysisFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def _lock_key(ticker: str, days_range: int, time_bucket: int) -> int:
+    digest = hashlib.blake2b(
+        f"analysis:{ticker}:{days_range}:{time_bucket}".encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _recorded_error(error_type: str, message: str) -> Exception:
+    error_class = getattr(errors, error_type, None)
+    if not (isinstance(error_class, type) and issubclass(error_class, Exception)):
+        error_class = ExternalAPIError
+    return error_class(message)
+
+
+class Analysis:
+    def __init__(self):
+        self.id: UUID = None
+        self.ticker: str = None
+        self.days_range: int = None
+        self.time_bucket: int = None
+        self.overall_summary: str = None
+        self.positive_summaries: Dict = None
+        self.negative_summaries: Dict = None
+        self.sources: Dict = None
+        self.score: float = None
+        self.data_from: datetime = None
+        self.created_at: datetime = None
+
+    @classmethod
+    def _from_query(cls, analysis_query: AnalysisModel):
+        analysis_instance = cls()
+        analysis_instance.id = analysis_query.id
+        analysis_instance.ticker = analysis_query.ticker
+        analysis_instance.days_range = analysis_query.days_range
+        analysis_instance.time_bucket = analysis_query.time_bucket
+        analysis_instance.overall_summary = analysis_query.overall_summary
+        analysis_instance.positive_summaries = analysis_query.positive_summaries
+        analysis_instance.negative_summaries = analysis_query.negative_summaries
+        analysis_instance.sources = analysis_query.sources
+        analysis_instance.score = analysis_query.score
+        analysis_instance.data_from = analysis_query.data_from
+        analysis_instance.created_at = analysis_query.created_at
+
+        return analysis_instance
+
+    @classmethod
+    def get_by_id(cls, analysis_id: UUID):
+        analysis_query = AnalysisModel.query.get(analysis_id)
+        if analysis_query is None:
+            raise NotFoundError(f"Analysis with id {analysis_id} not found.")
+
+        return cls._from_query(analysis_query)
+
+    @classmethod
+    def get_cached(cls, ticker: str, days_range: int, time_bucket: int):
+        analysis_query = AnalysisModel.query.filter_by(
+            ticker=ticker, days_range=days_range, time_bucket=time_bucket
+        ).one_or_none()
+
+        if analysis_query is None:
+            return None
+
+        return cls._from_query(analysis_query)
+
+    @classmethod
+    def get_or_generate(
+        cls,
+        ticker: str,
+        days_range: int,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
+        time_bucket = int(time.time() // ANALYSIS_CACHE_TTL_SECONDS)
+
+        cached_analysis = cls.get_cached(ticker, days_range, time_bucket)
+        if cached_analysis is not None:
+            return cached_analysis
+
+        flight_key = (ticker, days_range, time_bucket)
+        with _flights_lock:
+            flight = _flights.get(flight_key)
+            is_leader = flight is None
+            if is_leader:
+                flight = AnalysisFlight()
+                _flights[flight_key] = flight
+                progress_broker.open(flight.channel_id)
+
+        if not is_leader:
+            return cls._follow(flight, on_progress)
+
+        def publish(event: str, data: Dict):
+            progress_broker.publish(flight.channel_id, event, data)
+            if on_progress is not None:
+                on_progress(event, data)
+
+        try:
+            flight.result = cls._generate_exclusive(ticker, days_range, time_bucket, publish)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with _flights_lock:
+                del _flights[flight_key]
+            progress_broker.close(flight.channel_id)
+
+    @classmethod
+    def _follow(
+        cls,
+        flight: AnalysisFlight,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
+        for event in progress_broker.subscribe(flight.channel_id):
+            if event is not None and on_progress is not None:
+                on_progress(event["event"], event["data"])
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @classmethod
+    def _generate_exclusive(
+        cls,
+        ticker: str,
+        days_range: int,
+        time_bucket: int,
+        on_progress: Callable[[str, Dict], None],
+    ):
+        lock_key = _lock_key(ticker, days_range, time_bucket)
+        progress_filter = (
+            (AnalysisProgressModel.ticker == ticker)
+            & (AnalysisProgressModel.days_range == days_range)
+            & (AnalysisProgressModel.time_bucket == time_bucket)
+        )
+        waiting_since = datetime.utcnow()
+        stage = None
+
+        with db.engine.connect() as lock_connection:
+            while True:
+                acquired = lock_connection.execute(
+                    select(func.pg_try_advisory_lock(lock_key))
+                ).scalar()
+                progress = lock_connection.execute(
+                    select(
+                        AnalysisProgressModel.stage,
+                        AnalysisProgressModel.error_type,
+                        AnalysisProgressModel.error,
+                        AnalysisProgressModel.updated_at,
+                    ).where(progress_filter)
+                ).one_or_none()
+                lock_connection.commit()
+
+                if acquired:
+                    try:
+                        if (
+                            progress is not None
+                            and progress.error is not None
+                            and progress.updated_at >= waiting_since
+                        ):
+                            raise _recorded_error(progress.error_type, progress.error)
+                        return cls._generate_locked(
+                            ticker, days_range, time_bucket, on_progress
+                        )
+                    finally:
+                        lock_connection.execute(select(func.pg_advisory_unlock(lock_key)))
+                        lock_connection.commit()
+
+                cached_analysis = cls.get_cached(ticker, days_range, time_bucket)
+                db.session.commit()
+                if cached_analysis is not None:
+                    return cached_analysis
+
+                if progress is not None and progress.stage not in (None, stage):
+                    stage = progress.stage
+                    on_progress("stage", {"stage": stage})
+                time.sleep(ANALYSIS_FOLLOW_POLL_SECONDS)
+
+    @classmethod
+    def _record_progress(cls, ticker: str, days_range: int, time_bucket: int, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        upsert_statement = (
+            insert(AnalysisProgressModel)
+            .values(ticker=ticker, days_range=days_range, time_bucket=time_bucket, **fields)
+            .on_conflict_do_update(
+                index_elements=["ticker", "days_range", "time_bucket"], set_=fields
+            )
+        )
+
+        try:
+            db.session.execute(upsert_statement)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError("Error recording analysis progress.")
+
+    @classmethod
+    def _generate_locked(
+        cls,
+        ticker: str,
+        days_range: int,
+        time_bucket: int,
+        on_progress: Callable[[str, Dict], None],
+    ):
+        cached_analysis = cls.get_cached(ticker, days_range, time_bucket)
+        if cached_analysis is not None:
+            return cached_analysis
+
+        cls._record_progress(
+            ticker, days_range, time_bucket, stage=None, error_type=None, error=None
+        )
+
+        def record_stage(event: str, data: Dict):
+            if event == "stage":
+                cls._record_progress(ticker, days_range, time_bucket, stage=data["stage"])
+            on_progress(event, data)
+
+        try:
+            analysis = cls._generate(ticker, days_range, time_bucket, record_stage)
+        except Exception as e:
+            db.session.rollback()
+            cls._record_progress(
+                ticker,
+                days_range,
+                time_bucket,
+                error_type=type(e).__name__,
+                error=getattr(e, "message", "An unexpected error occurred."),
+            )
+            raise
+
+        try:
+            AnalysisProgressModel.query.filter(
+                AnalysisProgressModel.time_bucket < time_bucket - 1
+            ).delete()
+            AnalysisProgressModel.query.filter_by(
+                ticker=ticker, days_range=days_range, time_bucket=time_bucket
+            ).delete()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+        return analysis
+
+    @classmethod
+    def _generate(
+        cls,
+        ticker: str,
+        days_range: int,
+        time_bucket: int,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
+        created_at = datetime.utcnow()
+        data_from = created_at - timedelta(days=days_range)
+
+        article_collection = ArticleCollection(
+            ticker=ticker, days_ago=days_range, on_progress=on_progress
+        )
+
+        analysis_data = article_collection.full_analysis()
+
+        insert_statement = (
+            insert(AnalysisModel)
+            .values(
+                ticker=ticker,
+                days_range=days_range,
+                time_bucket=time_bucket,
+                overall_summary=analysis_data.get("overall_summary", ""),
+                positive_summaries=analysis_data.get("positive", []),
+                negative_summaries=analysis_data.get("negative", []),
+                sources=analysis_data.get("sources", []),
+                score=analysis_data.get("score", 0),
+                data_from=data_from,
+                created_at=created_at,
+            )
+            .on_conflict_do_nothing(
+                index_elements=["ticker", "days_range", "time_bucket"]
+            )
+        )
+
+        try:
+            db.session.execute(insert_statement)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError("Error saving analysis.")
+
+        return cls.get_cached(ticker, days_range, time_bucket)
@@ -1,13 +1,16 @@
-from typing import List
+from typing import List, Dict, Callable, Deque
 from models import db, Article as ArticleModel
+from sqlalchemy.dialects.postgresql import insert
 from entities.company import Company
-from lib.inference.prompt import stock_queries
+from entities.article_index import article_index
 from lib.inference.embedding import (
     check_article_relevance,
-    embed_texts,
-    filter_similar_texts,
+    embed_texts_cached,
+    filter_similar_text_groups,
+    query_embedding_store,
 )
-from lib.inference.external_api import create_parallel_request
+from lib.inference.external_api import run_parallel_request
+from lib.inference.runtime import inference_runtime
 from lib.inference.summary import (
     generate_base_summary,
     compress_base_summary,
@@ -17,9 +20,21 @@ from lib.inference.summary import (
 )
 from lib.utils import clean_text, create_batches
 from lib.news import get_news
-from exceptions.errors import InsufficientArticlesError
-import asyncio
+from lib.dedup import NearDuplicateIndex
+from exceptions.errors import InsufficientArticlesError, DBCommitError
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+import asyncio
+import numpy as np
+
+BASE_SUMMARY_CONCURRENCY = 20
+COMPRESS_SUMMARY_CONCURRENCY = 20
+NEWS_PREFETCH_PAGES = 3
+MAX_RELEVANT_ARTICLES = 30
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+news_prefetch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="news")
 
 
 class Article:
@@ -42,7 +57,9 @@ class Article:
         self.compressed_summary: str = ""
         self.sentiment: str = ""
         self.impact: str = ""
+        self.relevance: float = 0
         self.exists_in_db: bool = False
+        self.duplicates: List["Article"] = []
 
     def __str__(self):
         return f"Article title: {self.title}\nArticle content:\n{self.content}"
@@ -59,8 +76,27 @@ class Article:
             ),
             "clean_url": self.clean_url,
             "compressed_summary": self.compressed_summary,
+            "duplicates": [duplicate.to_source_json() for duplicate in self.duplicates],
         }
 
+    def to_source_json(self):
+        return {
+            "title": self.title,
+            "url": self.url,
+            "media": self.media,
+            "published_date": (
+                self.published_date.strftime("%Y-%m-%d %H:%M:%S")
+                if isinstance(self.published_date, datetime)
+                else self.published_date
+            ),
+            "clean_url": self.clean_url,
+        }
+
+    def to_progress_json(self):
+        progress_data = self.to_json()
+        progress_data.update({"sentiment": self.sentiment, "impact": self.impact})
+        return progress_data
+
 
 class SummaryPoint:
     def __init__(self, value: str, source: Article):
@@ -72,27 +108,39 @@ class SummaryPoint:
 
 
 class ArticleCollection:
-    def __init__(self, ticker: str, days_ago: int):
+    def __init__(
+        self,
+        ticker: str,
+        days_ago: int,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
         self.ticker: str = ticker
         self.days_ago: int = days_ago
+        self.on_progress: Callable[[str, Dict], None] = on_progress
 
         company = Company.get_by_ticker(ticker=ticker)
         self.company_name: str = company.company_name
         self.aliases: List[str] = company.aliases
 
         self.relevant_articles: List[Article] = []
+        self.near_duplicates = NearDuplicateIndex(threshold=NEAR_DUPLICATE_THRESHOLD)
+        self.seen_articles: List[Article] = []
+        self.page_duplicates: int = 0
         self.score: float = 0
         self.overall_summary: str = ""
         self.positive_summaries: List[SummaryPoint] = []
         self.negative_summaries: List[SummaryPoint] = []
 
-    def _fetch_articles(self, page: int = 1):
+    def _report(self, event: str, data: Dict):
+        if self.on_progress is not None:
+            self.on_progress(event, data)
+
+    def _fetch_page(self, page: int = 1):
         keywords = self.aliases + [self.company_name, self.ticker]
 
-        all_articles_data = get_news(
-            keywords=keywords, days_ago=self.days_ago, page=page
-        )
+        return get_news(keywords=keywords, days_ago=self.days_ago, page=page)
 
+    def _fetch_articles(self, all_articles_data: Dict):
         if all_articles_data["status"].lower() != "ok":
             return None
 
@@ -114,51 +162,179 @@ class ArticleCollection:
         for article in self.relevant_articles:
             title_set.add(article.title)
         unique_articles = []
+        self.page_duplicates = 0
         for article in articles:
-            if article.title not in title_set:
-                title_set.add(article.title)
-                unique_articles.append(article)
+            if article.title in title_set:
+                continue
+            title_set.add(article.title)
+
+            canonical_index = self.near_duplicates.add(len(self.seen_articles), article.content)
+            if canonical_index is not None:
+                self.seen_articles[canonical_index].duplicates.append(article)
+                self.page_duplicates += 1
+                continue
+
+            self.seen_articles.append(article)
+            unique_articles.append(article)
 
         return unique_articles
 
-    def generate_relevant_articles(self):
-        page = 1
-        minimum_article_threshold = 20
-        while True:
-            if len(self.relevant_articles) >= minimum_article_threshold:
-                break
+    def _score_articles(self, new_unique_articles: List[Article], page: int):
+        news_article_texts = [article.content for article in new_unique_articles]
+
+        article_embeddings = embed_texts_cached(news_article_texts)
+        query_embeddings = query_embedding_store.get(
+            self.ticker, self.company_name, self.aliases
+        )
+
+        relevance_scores, is_relevant = check_article_relevance(
+            article_embeddings, query_embeddings
+        )
+
+        relevant_articles = []
+        for i in np.flatnonzero(is_relevant):
+            article = new_unique_articles[i]
+            article.relevance = float(relevance_scores[i])
+            relevant_articles.append(article)
+
+        self.relevant_articles.extend(relevant_articles)
+        self._report(
+            "articles",
+            {
+                "page": page,
+                "fetched": len(new_unique_articles),
+                "relevant": len(relevant_articles),
+                "duplicates": self.page_duplicates,
+                "total_relevant": len(self.relevant_articles),
+                "sources": [article.to_json() for article in relevant_articles],
+            },
+        )
 
-            new_unique_articles = self._fetch_articles(page=page)
-            if new_unique_articles == None:
-                break
+    def _keep_most_relevant(self, limit: int):
+        if len(self.relevant_articles) <= limit:
+            return
 
-            news_article_texts = [article.content for article in new_unique_articles]
+        relevance_scores = np.array(
+            [article.relevance for article in self.relevant_articles], dtype=np.float32
+        )
+        top_indices = np.argpartition(-relevance_scores, limit - 1)[:limit]
+        self.relevant_articles = [self.relevant_articles[i] for i in np.sort(top_indices)]
 
-            queries = stock_queries(self.company_name)
+    def generate_relevant_articles(self):
+        page = 1
+        next_prefetch_page = 1
+        prefetched_pages: Deque[Future] = deque()
+        minimum_article_threshold = 20
+        try:
+            while True:
+                if len(self.relevant_articles) >= minimum_article_threshold:
+                    break
+
+                while len(prefetched_pages) < NEWS_PREFETCH_PAGES:
+                    prefetched_pages.append(
+                        news_prefetch_executor.submit(self._fetch_page, next_prefetch_page)
+                    )
+                    next_prefetch_page += 1
 
-            article_embeddings = embed_texts(news_article_texts)
-            query_embeddings = embed_texts(queries)
+                all_articles_data = prefetched_pages.popleft().result()
+                new_unique_articles = self._fetch_articles(all_articles_data)
+                if new_unique_articles == None:
+                    break
 
-            relevant_articles = []
-            for i, article_embedding in enumerate(article_embeddings):
-                if check_article_relevance(article_embedding, query_embeddings):
-                    relevant_articles.append(new_unique_articles[i])
+                self._score_articles(new_unique_articles, page)
+                page += 1
+        finally:
+            for prefetched_page in prefetched_pages:
+                prefetched_page.cancel()
 
-            self.relevant_articles.extend(relevant_articles)
-            page += 1
+        self._keep_most_relevant(MAX_RELEVANT_ARTICLES)
 
         if len(self.relevant_articles) < 10:
             raise InsufficientArticlesError(
                 f"Insufficient data information about {self.company_name.rstrip('.')}. Please try increasing the time frame."
             )
 
+    async def _summarize_new_articles(self, new_articles: List[Article]):
+        base_summary_session = inference_runtime.get_session("gemini")
+        compress_summary_session = inference_runtime.get_session("openai")
+        base_summary_limit = asyncio.Semaphore(BASE_SUMMARY_CONCURRENCY)
+        compress_summary_limit = asyncio.Semaphore(COMPRESS_SUMMARY_CONCURRENCY)
+
+        async def summarize(article: Article):
+            async with base_summary_limit:
+                article.summary = await generate_base_summary(
+                    base_summary_session,
+                    company_name=self.company_name,
+                    article=str(article),
+                )
+
+            async with compress_summary_limit:
+                analysis_result = await compress_base_summary(
+                    compress_summary_session,
+                    company_name=self.company_name,
+                    article_title=article.title,
+                    summary=article.summary,
+                )
+
+            article.compressed_summary = analysis_result["summary"]
+            article.sentiment = analysis_result["sentiment"]
+            article.impact = analysis_result["impact"]
+            self._report("article_summary", article.to_progress_json())
+
+        await asyncio.gather(*(summarize(article) for article in new_articles))
+
+    def _save_new_articles(self, new_articles: List[Article]):
+        if not new_articles:
+            return
+
+        new_article_rows = [
+            {
+                "ticker": self.ticker,
+                "title": article.title,
+                "media": article.media,
+                "published_date": article.published_date,
+                "clean_url": article.clean_url,
+                "compressed_summary": article.compressed_summary,
+                "sentiment": article.sentiment,
+                "impact": article.impact,
+            }
+            for article in new_articles
+        ]
+        insert_statement = (
+            insert(ArticleModel)
+            .values(new_article_rows)
+            .on_conflict_do_nothing(index_elements=["ticker", "title"])
+            .returning(ArticleModel.id, ArticleModel.title)
+        )
+
+        try:
+            inserted_ids = {
+                title: article_id
+                for article_id, title in db.session.execute(insert_statement).all()
+            }
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError(f"Error saving articles for {self.ticker}.")
+
+        for new_article_row in new_article_rows:
+            new_article_row["id"] = inserted_ids.get(new_article_row["title"])
+        article_index.add_articles(
+            [new_article_row for new_article_row in new_article_rows if new_article_row["id"]]
+        )
+
     def summarize_articles(self):
-        generate_base_summary_data = []
-        compress_base_summary_data = []
+        titles = [article.title for article in self.relevant_articles]
+        existing_articles = {
+            article_query.title: article_query
+            for article_query in ArticleModel.query.filter(
+                ArticleModel.ticker == self.ticker, ArticleModel.title.in_(titles)
+            ).all()
+        }
+
+        new_articles = []
         for article in self.relevant_articles:
-            article_query = ArticleModel.query.filter_by(
-                ticker=self.ticker, title=article.title
-            ).one_or_none()
+            article_query = existing_articles.get(article.title)
 
             if article_query is not None:
                 article.compressed_summary = article_query.compressed_summary
@@ -168,41 +344,11 @@ class ArticleCollection:
                 article.published_date = article_query.published_date
                 article.clean_url = article_query.clean_url
                 article.exists_in_db = True
+                self._report("article_summary", article.to_progress_json())
             else:
-                generate_base_summary_data.append(
-                    {"company_name": self.company_name, "article": str(article)}
-                )
-                compress_base_summary_data.append(
-                    {
-                        "company_name": self.company_name,
-                        "article_title": article.title,
-                        "summary": article.summary,
-                    }
-                )
+                new_articles.append(article)
 
-        summaries = asyncio.run(
-            create_parallel_request(
-                func=generate_base_summary, data=generate_base_summary_data
-            )
-        )
-
-        for article in self.relevant_articles:
-            if not article.exists_in_db:
-                article.summary = summaries[0]
-                summaries.pop(0)
-
-        analysis_results = asyncio.run(
-            create_parallel_request(
-                func=compress_base_summary, data=compress_base_summary_data
-            )
-        )
-
-        for article in self.relevant_articles:
-            if not article.exists_in_db:
-                article.compressed_summary = analysis_results[0]["summary"]
-                article.sentiment = analysis_results[0]["sentiment"]
-                article.impact = analysis_results[0]["impact"]
-                analysis_results.pop(0)
+        inference_runtime.run(self._summarize_new_articles(new_articles))
 
         total_score = 0
         total_weight = 0
@@ -214,27 +360,21 @@ class ArticleCollection:
             total_score += int_score * int_weight
             total_weight += int_weight
 
-            if not article.exists_in_db:
-                try:
-                    new_article = ArticleModel(
-                        ticker=self.ticker,
-                        title=article.title,
-                        media=article.media,
-                        published_date=article.published_date,
-                        clean_url=article.clean_url,
-                        compressed_summary=article.compressed_summary,
-                        sentiment=article.sentiment,
-                        impact=article.impact,
-                    )
-                    db.session.add(new_article)
-                    db.session.commit()
-                except Exception as e:
-                    db.session.rollback()
-                    raise Exception(str(e))
+        self._save_new_articles(new_articles)
 
         overall_score = total_score / total_weight if total_weight != 0 else 0
 
         self.score = round(overall_score, 1)
+        self._report("score", {"score": self.score})
+
+    def _summary_points_json(self, summary_points_json: List[Dict]):
+        return [
+            {
+                "value": summary_point_json["info"],
+                "source": self.relevant_articles[summary_point_json["source"]].to_json(),
+            }
+            for summary_point_json in summary_points_json
+        ]
 
     def generate_sentiment_summaries(self, filter_unique: bool = False):
         article_batches = create_batches(self.relevant_articles, 10)
@@ -252,8 +392,21 @@ class ArticleCollection:
                 }
             )
 
-        sentiment_summary_batch_results = asyncio.run(
-            create_parallel_request(func=generate_sentiment_summaries, data=data)
+        def on_batch_result(index: int, batch: Dict):
+            self._report(
+                "sentiment_batch",
+                {
+                    "batch": index,
+                    "positive": self._summary_points_json(batch.get("positive", [])),
+                    "negative": self._summary_points_json(batch.get("negative", [])),
+                },
+            )
+
+        sentiment_summary_batch_results = run_parallel_request(
+            func=generate_sentiment_summaries,
+            data=data,
+            provider="openai",
+            on_result=on_batch_result,
         )
 
         merged_results = {"positive": [], "negative": []}
@@ -287,11 +440,11 @@ class ArticleCollection:
                 summary.value for summary in self.negative_summaries
             ]
 
-            filtered_positive_summary_indices = filter_similar_texts(
-                all_positive_summary_points, threshold=0.94
-            )
-            filtered_negative_summary_indices = filter_similar_texts(
-                all_negative_summary_points, threshold=0.94
+            filtered_positive_summary_indices, filtered_negative_summary_indices = (
+                filter_similar_text_groups(
+                    [all_positive_summary_points, all_negative_summary_points],
+                    threshold=0.94,
+                )
             )
 
             self.positive_summaries = [
@@ -302,13 +455,20 @@ class ArticleCollection:
             ]
 
     def full_analysis(self):
+        self._report("stage", {"stage": "fetching_articles"})
         self.generate_relevant_articles()
+        self._report("stage", {"stage": "summarizing_articles"})
         self.summarize_articles()
+        self._report("stage", {"stage": "generating_summaries"})
         self.generate_sentiment_summaries(filter_unique=True)
 
+        positive = [summary.to_json() for summary in self.positive_summaries]
+        negative = [summary.to_json() for summary in self.negative_summaries]
+        self._report("summaries", {"positive": positive, "negative": negative})
+
         return {
-            "positive": [summary.to_json() for summary in self.positive_summaries],
-            "negative": [summary.to_json() for summary in self.negative_summaries],
+            "positive": positive,
+            "negative": negative,
             "score": self.score,
             "sources": [article.to_json() for article in self.relevant_articles],
         }
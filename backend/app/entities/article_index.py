@@ -0,0 +1,305 @@
+from models import db, Article as ArticleModel
+from lib.ann import IVFFlatIndex
+from lib.inference.embedding import embed_texts, embed_texts_cached
+from lib.jobs import run_periodically
+from lib.metrics import register_metrics
+from exceptions.errors import IndexNotReadyError
+from typing import List, Dict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import numpy as np
+import atexit
+import fcntl
+import os
+import threading
+import time
+
+load_dotenv(".env.local")
+
+ARTICLE_INDEX_PATH = os.getenv(
+    "ARTICLE_INDEX_PATH", os.path.join(".cache", "article_index", "index.npz")
+)
+ARTICLE_INDEX_SNAPSHOT_SECONDS = int(os.getenv("ARTICLE_INDEX_SNAPSHOT_SECONDS", 300))
+ARTICLE_INDEX_NPROBE = int(os.getenv("ARTICLE_INDEX_NPROBE", 8))
+ARTICLE_INDEX_SYNC_SECONDS = int(os.getenv("ARTICLE_INDEX_SYNC_SECONDS", 30))
+ARTICLE_INDEX_SYNC_LOOKBACK = int(os.getenv("ARTICLE_INDEX_SYNC_LOOKBACK", 5000))
+SYNC_BATCH_SIZE = 2000
+
+
+def _timestamp(published_date: datetime) -> float:
+    return published_date.timestamp() if isinstance(published_date, datetime) else np.nan
+
+
+def _article_row(article_query: ArticleModel) -> Dict:
+    return {
+        "id": article_query.id,
+        "ticker": article_query.ticker,
+        "compressed_summary": article_query.compressed_summary,
+        "sentiment": article_query.sentiment,
+        "published_date": article_query.published_date,
+    }
+
+
+class ArticleIndex:
+    def __init__(self, path: str):
+        self.path: str = path
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._sync_pid: int = None
+        self._writer_pid: int = None
+        self._writer_file = None
+        self._synced: bool = False
+        self.index: IVFFlatIndex = None
+        self.synced_id: int = 0
+        self._indexed_ids = set()
+        self._last_snapshot: float = time.monotonic()
+        self._loaded_mtime: float = None
+        self._dirty: bool = False
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        index, extra = IVFFlatIndex.load(self.path, nprobe=ARTICLE_INDEX_NPROBE)
+        self.index = index
+        self.synced_id = int(extra.get("synced_id", 0))
+        self._indexed_ids = set(index.ids.tolist())
+        self._loaded_mtime = mtime
+        self._dirty = False
+
+    def _ensure_loaded(self):
+        if self.index is None and os.path.exists(self.path):
+            self._load()
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                self._load()
+
+    def _is_writer(self) -> bool:
+        if self._writer_pid == os.getpid():
+            return True
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._writer_file = lock_file
+        self._writer_pid = os.getpid()
+        return True
+
+    def preload(self):
+        with self._lock:
+            self._ensure_loaded()
+
+    def start_sync(self):
+        if self._sync_pid == os.getpid():
+            return
+        self._sync_pid = os.getpid()
+        run_periodically(
+            self.sync, ARTICLE_INDEX_SYNC_SECONDS, name="article-index-sync", initial_delay=0
+        )
+
+    def add_articles(self, article_rows: List[Dict]):
+        with self._lock:
+            self._ensure_loaded()
+            article_rows = [
+                article_row
+                for article_row in article_rows
+                if article_row["id"] not in self._indexed_ids
+            ]
+        if not article_rows:
+            return
+
+        embeddings = embed_texts_cached(
+            [article_row["compressed_summary"] for article_row in article_rows]
+        )
+
+        with self._lock:
+            new_positions = [
+                position
+                for position, article_row in enumerate(article_rows)
+                if article_row["id"] not in self._indexed_ids
+            ]
+            if not new_positions:
+                return
+            article_rows = [article_rows[position] for position in new_positions]
+            embeddings = embeddings[new_positions]
+
+            if self.index is None:
+                self.index = IVFFlatIndex(embeddings.shape[1], nprobe=ARTICLE_INDEX_NPROBE)
+
+            self.index.add(
+                [article_row["id"] for article_row in article_rows],
+                embeddings,
+                {
+                    "ticker": [article_row["ticker"] for article_row in article_rows],
+                    "sentiment": [
+                        (article_row["sentiment"] or "").lower() for article_row in article_rows
+                    ],
+                    "published": np.array(
+                        [_timestamp(article_row["published_date"]) for article_row in article_rows],
+                        dtype=np.float64,
+                    ),
+                },
+            )
+            self._indexed_ids.update(article_row["id"] for article_row in article_rows)
+            self._dirty = True
+
+            if time.monotonic() - self._last_snapshot >= ARTICLE_INDEX_SNAPSHOT_SECONDS:
+                self.snapshot()
+
+    def sync(self):
+        with self._sync_lock:
+            writer = self._is_writer()
+            if not writer:
+                self._reload_if_changed()
+
+            with self._lock:
+                if not writer and self.index is None:
+                    return
+                self._ensure_loaded()
+                synced_id = self.synced_id
+
+            self._sync_missed(synced_id)
+            while True:
+                article_queries = (
+                    ArticleModel.query.filter(ArticleModel.id > synced_id)
+                    .order_by(ArticleModel.id)
+                    .limit(SYNC_BATCH_SIZE)
+                    .all()
+                )
+                if not article_queries:
+                    break
+
+                self.add_articles(
+                    [_article_row(article_query) for article_query in article_queries]
+                )
+                synced_id = article_queries[-1].id
+                with self._lock:
+                    self.synced_id = synced_id
+                    self._dirty = True
+
+            self._synced = True
+            if writer and not os.path.exists(self.path):
+                self.snapshot()
+
+    def _sync_missed(self, synced_id: int):
+        recent_ids = (
+            db.session.query(ArticleModel.id)
+            .filter(
+                ArticleModel.id > synced_id - ARTICLE_INDEX_SYNC_LOOKBACK,
+                ArticleModel.id <= synced_id,
+            )
+            .all()
+        )
+        with self._lock:
+            missed_ids = [
+                article_id for (article_id,) in recent_ids if article_id not in self._indexed_ids
+            ]
+
+        for start in range(0, len(missed_ids), SYNC_BATCH_SIZE):
+            article_queries = ArticleModel.query.filter(
+                ArticleModel.id.in_(missed_ids[start : start + SYNC_BATCH_SIZE])
+            ).all()
+            self.add_articles(
+                [_article_row(article_query) for article_query in article_queries]
+            )
+
+    def search(
+        self,
+        query: str,
+        ticker: str = None,
+        date_from: datetime = None,
+        date_to: datetime = None,
+        sentiment: str = None,
+        limit: int = 20,
+    ) -> List[Dict]:
+        self.start_sync()
+        with self._lock:
+            self._ensure_loaded()
+            if self.index is None and not self._synced:
+                raise IndexNotReadyError("Article search index is still being built.")
+
+        query_embedding = np.asarray(embed_texts([query]), dtype=np.float32)[0]
+
+        with self._lock:
+            if self.index is None or self.index.size == 0:
+                return []
+
+            mask = np.ones(self.index.size, dtype=bool)
+            if ticker is not None:
+                mask &= self.index.attribute("ticker") == ticker.upper()
+            if sentiment is not None:
+                mask &= self.index.attribute("sentiment") == sentiment.lower()
+            if date_from is not None:
+                mask &= self.index.attribute("published") >= date_from.timestamp()
+            if date_to is not None:
+                mask &= (
+                    self.index.attribute("published") < (date_to + timedelta(days=1)).timestamp()
+                )
+
+            article_ids, scores = self.index.search(query_embedding, k=limit, mask=mask)
+
+        if len(article_ids) == 0:
+            return []
+
+        article_queries = {
+            article_query.id: article_query
+            for article_query in ArticleModel.query.filter(
+                ArticleModel.id.in_(article_ids.tolist())
+            ).all()
+        }
+
+        results = []
+        for article_id, score in zip(article_ids.tolist(), scores):
+            article_query = article_queries.get(article_id)
+            if article_query is None:
+                continue
+            results.append(
+                {
+                    "id": article_query.id,
+                    "ticker": article_query.ticker,
+                    "title": article_query.title,
+                    "media": article_query.media,
+                    "published_date": article_query.published_date,
+                    "clean_url": article_query.clean_url,
+                    "compressed_summary": article_query.compressed_summary,
+                    "sentiment": article_query.sentiment,
+                    "impact": article_query.impact,
+                    "score": round(float(score), 4),
+                }
+            )
+
+        return results
+
+    def snapshot(self):
+        with self._lock:
+            if self._writer_pid != os.getpid() or self.index is None or not self._dirty:
+                return
+            self.index.save(self.path, synced_id=self.synced_id)
+            self._loaded_mtime = os.path.getmtime(self.path)
+            self._dirty = False
+            self._last_snapshot = time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": 0 if self.index is None else self.index.size,
+                "lists": (
+                    len(self.index.centroids)
+                    if self.index is not None and self.index.centroids is not None
+                    else 0
+                ),
+                "synced_id": self.synced_id,
+            }
+
+
+article_index = ArticleIndex(ARTICLE_INDEX_PATH)
+atexit.register(article_index.snapshot)
+register_metrics("article_index", article_index.stats)
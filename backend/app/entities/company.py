@@ -1,7 +1,21 @@
 from models import Company as CompanyModel
 from exceptions.errors import NotFoundError
-from uuid import UUID
-from typing import List
+from lib.inference.embedding import query_embedding_store
+from sqlalchemy import event, inspect
+from typing import List, Dict, Tuple
+from dotenv import load_dotenv
+from bisect import bisect_left
+import gzip
+import heapq
+import hashlib
+import json
+import os
+import threading
+import time
+
+load_dotenv(".env.local")
+
+COMPANY_CATALOG_TTL_SECONDS = int(os.getenv("COMPANY_CATALOG_TTL_SECONDS", 300))
 
 
 class Company:
@@ -22,12 +36,7 @@ class Company:
         self.currency: str = currency
 
     @classmethod
-    def get_by_id(cls, company_id: int):
-        company_query = CompanyModel.query.get(company_id)
-
-        if company_query is None:
-            raise NotFoundError(f"Company with id {company_id} not found.")
-
+    def _from_query(cls, company_query: CompanyModel):
         company_instance = cls()
         company_instance.id = company_query.id
         company_instance.company_name = company_query.company_name
@@ -38,21 +47,43 @@ class Company:
 
         return company_instance
 
+    def copy(self):
+        return Company(
+            company_id=self.id,
+            company_name=self.company_name,
+            ticker=self.ticker,
+            aliases=list(self.aliases),
+            exchange=self.exchange,
+            currency=self.currency,
+        )
+
+    @classmethod
+    def get_by_id(cls, company_id: int):
+        company = company_catalog.index().get_by_id(company_id)
+        if company is not None:
+            return company.copy()
+
+        company_query = CompanyModel.query.get(company_id)
+
+        if company_query is None:
+            raise NotFoundError(f"Company with id {company_id} not found.")
+
+        company_catalog.invalidate()
+        return cls._from_query(company_query)
+
     @classmethod
     def get_by_ticker(cls, ticker: str):
+        company = company_catalog.index().get_by_ticker(ticker)
+        if company is not None:
+            return company.copy()
+
         company_query = CompanyModel.query.filter_by(ticker=ticker).one_or_none()
 
         if company_query is None:
             raise NotFoundError(f"Company with ticker {ticker} not found.")
 
-        company_instance = cls()
-        company_instance.id = company_query.id
-        company_instance.company_name = company_query.company_name
-        company_instance.ticker = company_query.ticker
-        company_instance.aliases = company_query.aliases
-        company_instance.exchange = company_query.exchange
-        company_instance.currency = company_query.currency
-        return company_instance
+        company_catalog.invalidate()
+        return cls._from_query(company_query)
 
     def to_json(self):
         return {
@@ -98,3 +129,127 @@ class CompanyList:
             company_list.append(company_data)
 
         return company_list
+
+
+class CatalogVariant:
+    def __init__(self, company_list: List[Dict]):
+        self.body: bytes = json.dumps(
+            company_list, sort_keys=True, separators=(",", ":")
+        ).encode()
+        self.gzip_body: bytes = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag: str = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+def _normalize(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+
+class CompanyIndex:
+    def __init__(self, companies: List[Company]):
+        self.by_id: Dict[int, Company] = {company.id: company for company in companies}
+        self.by_ticker: Dict[str, Company] = {
+            company.ticker.upper(): company for company in companies
+        }
+
+        entries: List[Tuple[str, int, int]] = []
+        for company in companies:
+            entries.append((_normalize(company.ticker), 0, company.id))
+            entries.append((_normalize(company.company_name), 1, company.id))
+            for alias in company.aliases or []:
+                entries.append((_normalize(alias), 2, company.id))
+            for word in _normalize(company.company_name).split()[1:]:
+                entries.append((word, 3, company.id))
+        entries.sort()
+
+        self._keys: List[str] = [key for key, _, _ in entries]
+        self._entries: List[Tuple[str, int, int]] = entries
+
+    def get_by_id(self, company_id: int) -> Company:
+        return self.by_id.get(company_id)
+
+    def get_by_ticker(self, ticker: str) -> Company:
+        return self.by_ticker.get((ticker or "").upper())
+
+    def suggest(self, query: str, limit: int = 10) -> List[Company]:
+        query = _normalize(query)
+        if not query:
+            return []
+
+        best_matches: Dict[int, Tuple[int, int, int]] = {}
+        position = bisect_left(self._keys, query)
+        while position < len(self._keys) and self._keys[position].startswith(query):
+            key, field, company_id = self._entries[position]
+            rank = (field, key != query, len(key))
+            if company_id not in best_matches or rank < best_matches[company_id]:
+                best_matches[company_id] = rank
+            position += 1
+
+        top_matches = heapq.nsmallest(
+            limit, best_matches.items(), key=lambda match: (match[1], match[0])
+        )
+        return [self.by_id[company_id] for company_id, _ in top_matches]
+
+
+class CatalogState:
+    def __init__(self, companies: List[Company], variants: Dict[bool, CatalogVariant]):
+        self.index = CompanyIndex(companies)
+        self.variants: Dict[bool, CatalogVariant] = variants
+        self.loaded_at: float = time.monotonic()
+
+
+class CompanyCatalog:
+    def __init__(self, ttl: int = COMPANY_CATALOG_TTL_SECONDS):
+        self.ttl: int = ttl
+        self._lock = threading.Lock()
+        self._state: CatalogState = None
+
+    def _current(self) -> CatalogState:
+        state = self._state
+        if state is not None and time.monotonic() - state.loaded_at <= self.ttl:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is not None and time.monotonic() - state.loaded_at <= self.ttl:
+                return state
+
+            company_list = CompanyList()
+            self._state = CatalogState(
+                company_list.companies,
+                {
+                    full_data: CatalogVariant(company_list.get_all(full_data=full_data))
+                    for full_data in (True, False)
+                },
+            )
+            return self._state
+
+    def get(self, full_data: bool = True) -> CatalogVariant:
+        return self._current().variants[full_data]
+
+    def index(self) -> CompanyIndex:
+        return self._current().index
+
+    def invalidate(self, *args):
+        with self._lock:
+            self._state = None
+
+
+def preload_query_embeddings():
+    query_embedding_store.preload(
+        [
+            (company.ticker, company.company_name, company.aliases)
+            for company in company_catalog.index().by_id.values()
+        ]
+    )
+
+
+def _invalidate_query_embeddings(mapper, connection, company_query: CompanyModel):
+    for ticker in {company_query.ticker, *inspect(company_query).attrs.ticker.history.deleted}:
+        query_embedding_store.invalidate(ticker)
+
+
+company_catalog = CompanyCatalog()
+for event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(CompanyModel, event_name, company_catalog.invalidate)
+for event_name in ("after_update", "after_delete"):
+    event.listen(CompanyModel, event_name, _invalidate_query_embeddings)
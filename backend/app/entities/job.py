@@ -0,0 +1,247 @@
+from models import db, SearchJob as SearchJobModel
+from uuid import UUID
+from entities.user import User
+from lib.jobs import submit_job, run_periodically
+from lib.progress import progress_broker
+from exceptions.errors import NotFoundError, DBCommitError
+from sqlalchemy import update
+from typing import Dict, Set
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import os
+import threading
+
+load_dotenv(".env.local")
+
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+STALE_JOB_SECONDS = int(os.getenv("STALE_JOB_SECONDS", 120))
+
+_local_jobs: Set[UUID] = set()
+_local_jobs_lock = threading.Lock()
+_monitor_pid: int = None
+
+
+class SearchJob:
+    def __init__(self):
+        self.id: UUID = None
+        self.user_id: UUID = None
+        self.company_name: str = None
+        self.ticker: str = None
+        self.days_ago: int = None
+        self.status: str = "queued"
+        self.stage: str = None
+        self.search_id: UUID = None
+        self.error: str = None
+        self.created_at: datetime = None
+        self.updated_at: datetime = None
+
+    @classmethod
+    def _from_query(cls, job_query: SearchJobModel):
+        job_instance = cls()
+        job_instance.id = job_query.id
+        job_instance.user_id = job_query.user_id
+        job_instance.company_name = job_query.company_name
+        job_instance.ticker = job_query.ticker
+        job_instance.days_ago = job_query.days_ago
+        job_instance.status = job_query.status
+        job_instance.stage = job_query.stage
+        job_instance.search_id = job_query.search_id
+        job_instance.error = job_query.error
+        job_instance.created_at = job_query.created_at
+        job_instance.updated_at = job_query.updated_at
+
+        return job_instance
+
+    @classmethod
+    def get_by_id(cls, job_id: UUID):
+        job_query = SearchJobModel.query.get(job_id)
+        if job_query is None:
+            raise NotFoundError(f"Search job with id {job_id} not found.")
+
+        return cls._from_query(job_query)
+
+    @classmethod
+    def create(cls, user_id: UUID, company_name: str, ticker: str, days_ago: int):
+        new_job = SearchJobModel(
+            user_id=user_id,
+            company_name=company_name,
+            ticker=ticker,
+            days_ago=days_ago,
+            status="queued",
+        )
+
+        try:
+            db.session.add(new_job)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError("Error creating search job.")
+
+        return cls._from_query(new_job)
+
+    @classmethod
+    def resume_pending(cls):
+        global _monitor_pid
+
+        if _monitor_pid == os.getpid():
+            return
+        _monitor_pid = os.getpid()
+        run_periodically(
+            cls._monitor, JOB_HEARTBEAT_SECONDS, name="job-monitor", initial_delay=0
+        )
+
+    @classmethod
+    def _monitor(cls):
+        cls.heartbeat()
+        cls.recover_stale()
+
+    @classmethod
+    def heartbeat(cls):
+        with _local_jobs_lock:
+            job_ids = list(_local_jobs)
+        if not job_ids:
+            return
+
+        try:
+            SearchJobModel.query.filter(
+                SearchJobModel.id.in_(job_ids),
+                SearchJobModel.status.in_(("queued", "running")),
+            ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError("Error refreshing search job heartbeats.")
+
+    @classmethod
+    def recover_stale(cls):
+        stale_before = datetime.utcnow() - timedelta(seconds=STALE_JOB_SECONDS)
+        requeue_statement = (
+            update(SearchJobModel)
+            .where(
+                SearchJobModel.status.in_(("queued", "running")),
+                SearchJobModel.updated_at < stale_before,
+            )
+            .values(status="queued", updated_at=datetime.utcnow())
+            .returning(SearchJobModel.id)
+        )
+
+        try:
+            job_ids = db.session.execute(requeue_statement).scalars().all()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError("Error requeueing stale search jobs.")
+
+        for job_id in job_ids:
+            cls.get_by_id(job_id=job_id).enqueue()
+
+    def reload(self):
+        job_query = SearchJobModel.query.populate_existing().get(self.id)
+        if job_query is None:
+            raise NotFoundError(f"Search job with id {self.id} not found.")
+
+        self.status = job_query.status
+        self.stage = job_query.stage
+        self.search_id = job_query.search_id
+        self.error = job_query.error
+        self.updated_at = job_query.updated_at
+
+    def enqueue(self):
+        with _local_jobs_lock:
+            _local_jobs.add(self.id)
+        submit_job(SearchJob.run, self.id)
+
+    @classmethod
+    def run(cls, job_id: UUID):
+        try:
+            job = cls.get_by_id(job_id=job_id)
+            if job._claim():
+                job._execute()
+        finally:
+            with _local_jobs_lock:
+                _local_jobs.discard(job_id)
+
+    def _execute(self):
+        channel_id = str(self.id)
+        progress_broker.open(channel_id)
+
+        def on_progress(event: str, data: Dict):
+            if event == "stage":
+                self._update(stage=data["stage"])
+            progress_broker.publish(channel_id, event, data)
+
+        try:
+            try:
+                user = User.get_by_id(user_id=self.user_id)
+                search = user.create_search(
+                    ticker=self.ticker, days_ago=self.days_ago, on_progress=on_progress
+                )
+            except Exception as e:
+                db.session.rollback()
+                self._update(
+                    status="failed",
+                    error=getattr(e, "message", "An unexpected error occurred."),
+                )
+                progress_broker.publish(channel_id, "failed", {"error": self.error})
+                self._release_search()
+                return
+
+            self._update(status="done", stage=None, search_id=search.id)
+            progress_broker.publish(
+                channel_id,
+                "done",
+                {"search_id": str(search.id), "href": f"/search/{search.id}"},
+            )
+        finally:
+            progress_broker.close(channel_id)
+
+    def _release_search(self):
+        try:
+            User(user_id=self.user_id).release_search()
+        except DBCommitError:
+            pass
+
+    def _claim(self):
+        try:
+            claimed = SearchJobModel.query.filter_by(
+                id=self.id, status="queued"
+            ).update({"status": "running", "updated_at": datetime.utcnow()})
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError(f"Error claiming search job {self.id}.")
+
+        if claimed == 1:
+            self.status = "running"
+        return claimed == 1
+
+    def _update(self, **fields):
+        fields["updated_at"] = datetime.utcnow()
+
+        try:
+            SearchJobModel.query.filter_by(id=self.id).update(fields)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise DBCommitError(f"Error updating search job {self.id}.")
+
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def check_permission(self, user_id: UUID):
+        return self.user_id == user_id
+
+    def to_json(self):
+        return {
+            "job_id": str(self.id),
+            "company_name": self.company_name,
+            "ticker": self.ticker,
+            "days_ago": self.days_ago,
+            "status": self.status,
+            "stage": self.stage,
+            "search_id": str(self.search_id) if self.search_id else None,
+            "href": f"/search/{self.search_id}" if self.search_id else None,
+            "error": self.error,
+            "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "updated_at": self.updated_at.strftime("%Y-%m-%d %H:%M:%S"),
+        }
@@ -1,10 +1,23 @@
 from models import db, Search as SearchModel
-from uuid import UUID
-from entities.article import ArticleCollection
+from uuid import UUID, uuid4
+from flask import json
+from entities.analysis import Analysis
 from entities.company import Company
+from lib.cache import ByteLRUCache
+from lib.metrics import register_metrics
 from exceptions.errors import NotFoundError, DBCommitError
-from typing import Dict
-from datetime import datetime, timedelta
+from typing import Dict, Callable, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+import gzip
+import os
+
+load_dotenv(".env.local")
+
+SEARCH_PAYLOAD_CACHE_BYTES = int(os.getenv("SEARCH_PAYLOAD_CACHE_BYTES", 64 * 1024 * 1024))
+
+search_payload_cache = ByteLRUCache(max_bytes=SEARCH_PAYLOAD_CACHE_BYTES)
+register_metrics("search_payload_cache", search_payload_cache.snapshot)
 
 class Search:
     def __init__(self):
@@ -17,6 +30,7 @@ class Search:
         self.sources: Dict = None
         self.score: float = None
         self.days_range: int = None
+        self.analysis_id: UUID = None
         self.created_by: UUID = None
         self.data_from: datetime = None
         self.created_at: datetime = None
@@ -37,34 +51,109 @@ class Search:
         search_instance.sources = search_query.sources
         search_instance.score = search_query.score
         search_instance.days_range = search_query.days_range
+        search_instance.analysis_id = search_query.analysis_id
         search_instance.created_by = search_query.created_by
         search_instance.data_from = search_query.data_from
         search_instance.created_at = search_query.created_at
 
+        if search_instance.analysis_id is not None:
+            search_instance._load_analysis(Analysis.get_by_id(search_instance.analysis_id))
+
         return search_instance
 
     @classmethod
-    def generate_by_inference(cls, user_id: UUID, ticker: str, days_ago: int):
+    def get_payload(cls, search_id: UUID) -> Tuple[UUID, bytes]:
+        created_by = (
+            db.session.query(SearchModel.created_by)
+            .filter(SearchModel.id == search_id)
+            .scalar()
+        )
+        if created_by is None:
+            search_payload_cache.delete(search_id)
+            raise NotFoundError(f"Search with id {search_id} not found.")
+
+        payload = search_payload_cache.get(search_id)
+        if payload is not None:
+            return created_by, payload
+
+        payload = (
+            db.session.query(SearchModel.payload)
+            .filter(SearchModel.id == search_id)
+            .scalar()
+        )
+        if payload is None:
+            search = cls.get_by_id(search_id=search_id)
+            payload = search._serialize_payload(Company.get_by_ticker(ticker=search.ticker))
+
+            try:
+                SearchModel.query.filter_by(id=search_id).update({"payload": payload})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise DBCommitError(f"Error saving payload for search {search_id}.")
+
+        search_payload_cache.set(search_id, payload, size=len(payload))
+        return created_by, payload
+
+    def _serialize_payload(self, company: Company) -> bytes:
+        full_search_data = self.to_json()
+        full_search_data.update(
+            {"exchange": company.exchange, "currency": company.currency}
+        )
+
+        return gzip.compress(
+            json.dumps(full_search_data, separators=(",", ":")).encode(),
+            compresslevel=6,
+            mtime=0,
+        )
+
+    def _load_analysis(self, analysis: Analysis):
+        self.analysis_id = analysis.id
+        self.overall_summary = analysis.overall_summary
+        self.positive_summaries = analysis.positive_summaries
+        self.negative_summaries = analysis.negative_summaries
+        self.sources = analysis.sources
+        self.score = analysis.score
+        self.data_from = analysis.data_from
+
+    @classmethod
+    def generate_by_inference(
+        cls,
+        user_id: UUID,
+        ticker: str,
+        days_ago: int,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
         company = Company.get_by_ticker(ticker=ticker)
 
         created_at = datetime.utcnow()
-        data_from = created_at - timedelta(days=days_ago)
 
-        article_collection = ArticleCollection(ticker=ticker, days_ago=days_ago)
+        analysis = Analysis.get_or_generate(
+            ticker=ticker, days_range=days_ago, on_progress=on_progress
+        )
+
+        if on_progress is not None:
+            on_progress("stage", {"stage": "saving_search"})
 
-        analysis_data = article_collection.full_analysis()
+        search_instance = cls()
+        search_instance.id = uuid4()
+        search_instance.company_name = company.company_name
+        search_instance.ticker = ticker
+        search_instance.days_range = days_ago
+        search_instance.created_by = user_id
+        search_instance.created_at = created_at
+        search_instance._load_analysis(analysis)
 
         new_search = SearchModel(
+            id=search_instance.id,
             company_name=company.company_name,
             ticker=ticker,
-            overall_summary=analysis_data.get("overall_summary", ""),
-            positive_summaries=analysis_data.get("positive", []),
-            negative_summaries=analysis_data.get("negative", []),
-            sources=analysis_data.get("sources", []),
-            score=analysis_data.get("score", 0),
+            score=analysis.score,
             days_range=days_ago,
+            analysis_id=analysis.id,
+            payload=search_instance._serialize_payload(company),
             created_by=user_id,
-            data_from=data_from,
+            data_from=analysis.data_from,
             created_at=created_at,
         )
 
@@ -76,20 +165,6 @@ class Search:
             db.session.rollback()
             raise DBCommitError("Error saving search.")
 
-        search_instance = cls()
-        search_instance.id = new_search.id
-        search_instance.company_name = new_search.company_name
-        search_instance.ticker = new_search.ticker
-        search_instance.overall_summary = new_search.overall_summary
-        search_instance.positive_summaries = new_search.positive_summaries
-        search_instance.negative_summaries = new_search.negative_summaries
-        search_instance.sources = new_search.sources
-        search_instance.score = new_search.score
-        search_instance.days_range = new_search.days_range
-        search_instance.created_by = new_search.created_by
-        search_instance.data_from = new_search.data_from
-        search_instance.created_at = new_search.created_at
-
         return search_instance
     
     def delete(self):
@@ -99,6 +174,8 @@ class Search:
         except Exception:
             db.session.rollback()
             raise DBCommitError(f"An error occurred with deleting search {self.id}.")
+        finally:
+            search_payload_cache.delete(self.id)
 
     def check_permission(self, user_id: str) :
         return self.created_by == user_id
@@ -1,9 +1,30 @@
 from models import db, User as UserModel, Search as SearchModel
 from entities.search import Search
+from lib.utils import encode_cursor, decode_cursor
+from lib.cache import TTLCache
+from lib.metrics import register_metrics
+from sqlalchemy import tuple_, update, func
 from uuid import UUID
-from exceptions.errors import NotFoundError, DBCommitError
-from typing import List
+from exceptions.errors import (
+    NotFoundError,
+    DBCommitError,
+    InvalidRequestError,
+    SearchLimitError,
+)
+from typing import Callable, Dict
 from datetime import datetime
+from dotenv import load_dotenv
+import os
+import time
+
+load_dotenv(".env.local")
+
+DAILY_SEARCH_LIMITS = {"Basic": 10}
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+user_cache = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES)
+register_metrics("user_cache", user_cache.snapshot)
 
 
 class User:
@@ -11,27 +32,43 @@ class User:
         self.id: UUID = user_id
         self.email: str = email
         self.plan: str = "Basic"
-        self.search_ids: List[UUID] = []
         self.daily_search_count: int = 0
         self.created_at: datetime = None
 
     @classmethod
     def get_by_id(cls, user_id: UUID):
-        user_query = UserModel.query.get(user_id)
-
-        if user_query is None:
-            raise NotFoundError(f"User with id {user_id} not found.")
+        user_data = user_cache.get(str(user_id))
+        if user_data is None:
+            user_query = UserModel.query.get(user_id)
+
+            if user_query is None:
+                raise NotFoundError(f"User with id {user_id} not found.")
+
+            user_data = (
+                user_query.id,
+                user_query.email,
+                user_query.plan,
+                user_query.daily_search_count,
+                user_query.created_at,
+            )
+            user_cache.set(
+                str(user_id), user_data, expires_at=time.time() + USER_CACHE_TTL_SECONDS
+            )
 
         user_instance = cls()
-        user_instance.id = user_query.id
-        user_instance.email = user_query.email
-        user_instance.plan = user_query.plan
-        user_instance.search_ids = user_query.search_ids
-        user_instance.daily_search_count = user_query.daily_search_count
-        user_instance.created_at = user_query.created_at
+        (
+            user_instance.id,
+            user_instance.email,
+            user_instance.plan,
+            user_instance.daily_search_count,
+            user_instance.created_at,
+        ) = user_data
 
         return user_instance
 
+    def invalidate_cache(self):
+        user_cache.delete(str(self.id))
+
     def register(self):
         new_user = UserModel(id=self.id, email=self.email)
         try:
@@ -40,52 +77,100 @@ class User:
         except Exception:
             raise DBCommitError("Error registering user.")
 
-    def create_search(self, ticker: str, days_ago: int):
+    def create_search(
+        self,
+        ticker: str,
+        days_ago: int,
+        on_progress: Callable[[str, Dict], None] = None,
+    ):
         new_search = Search.generate_by_inference(
-            user_id=self.id, ticker=ticker, days_ago=days_ago
+            user_id=self.id, ticker=ticker, days_ago=days_ago, on_progress=on_progress
         )
-        self.search_ids.append(new_search.id)
-        self.daily_search_count += 1
+        self.invalidate_cache()
+
+        return new_search
+
+    def delete_search(self, search_id: UUID):
+        search = Search.get_by_id(search_id=search_id)
+        search.delete()
+        self.invalidate_cache()
+
+    def reserve_search(self):
+        reserve_statement = update(UserModel).where(UserModel.id == self.id)
+
+        daily_search_limit = DAILY_SEARCH_LIMITS.get(self.plan)
+        if daily_search_limit is not None:
+            reserve_statement = reserve_statement.where(
+                UserModel.daily_search_count < daily_search_limit
+            )
+
+        reserve_statement = reserve_statement.values(
+            daily_search_count=UserModel.daily_search_count + 1
+        ).returning(UserModel.daily_search_count)
 
         try:
-            user_query = UserModel.query.get(self.id)
-            user_query.search_ids = self.search_ids
-            user_query.daily_search_count = self.daily_search_count
+            daily_search_count = db.session.execute(reserve_statement).scalar_one_or_none()
             db.session.commit()
         except Exception:
             db.session.rollback()
-            raise DBCommitError(
-                f"Error saving search {new_search.id} to user {self.id}."
-            )
+            raise DBCommitError(f"Error reserving a search for user {self.id}.")
+        finally:
+            self.invalidate_cache()
 
-        return new_search
+        if daily_search_count is None:
+            raise SearchLimitError("Daily search limit reached.")
 
-    def delete_search(self, search_id: UUID):
-        search = Search.get_by_id(search_id=search_id)
-        search.delete()
+        self.daily_search_count = daily_search_count
+
+    def release_search(self):
+        release_statement = (
+            update(UserModel)
+            .where(UserModel.id == self.id)
+            .values(daily_search_count=func.greatest(UserModel.daily_search_count - 1, 0))
+        )
 
         try:
-            user_query = UserModel.query.get(self.id)
-            user_query.search_ids.remove(search_id)
+            db.session.execute(release_statement)
             db.session.commit()
         except Exception:
             db.session.rollback()
-            raise DBCommitError(
-                f"Error deleting search {search_id} from user {self.id}."
+            raise DBCommitError(f"Error releasing a search for user {self.id}.")
+        finally:
+            self.invalidate_cache()
+
+    def get_search_history(self, limit: int, cursor: str = None):
+        searches_query = db.session.query(
+            SearchModel.id,
+            SearchModel.company_name,
+            SearchModel.ticker,
+            SearchModel.created_at,
+        ).filter(SearchModel.created_by == self.id)
+
+        if cursor:
+            try:
+                cursor_values = decode_cursor(cursor)
+                cursor_created_at = datetime.fromisoformat(cursor_values["created_at"])
+                cursor_id = UUID(cursor_values["id"])
+            except Exception:
+                raise InvalidRequestError("Invalid search history cursor.")
+
+            searches_query = searches_query.filter(
+                tuple_(SearchModel.created_at, SearchModel.id)
+                < tuple_(cursor_created_at, cursor_id)
             )
 
-    def can_perform_search(self):
-        if self.plan == "Basic" and self.daily_search_count >= 10:
-            return False
-        return True
-
-    def get_search_history(self, page: int, limit: int):
-        searches_query = (
-            SearchModel.query.filter(SearchModel.id.in_(self.search_ids))
-            .order_by(SearchModel.created_at.desc())
-            .paginate(page=page, per_page=limit)
+        searches = (
+            searches_query.order_by(SearchModel.created_at.desc(), SearchModel.id.desc())
+            .limit(limit + 1)
+            .all()
         )
 
-        searches = searches_query.items
+        has_more = len(searches) > limit
+        searches = searches[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(
+                {"created_at": searches[-1].created_at.isoformat(), "id": str(searches[-1].id)}
+            )
 
-        return {"searches": searches, "has_more": searches_query.has_next}
+        return {"searches": searches, "has_more": has_more, "next_cursor": next_cursor}
@@ -37,3 +37,13 @@ class PermissionDeniedError(Exception):
     def __init__(self, message):
             self.message = message
             super().__init__(self.message)
+
+class EmbeddingWorkerError(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+class IndexNotReadyError(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
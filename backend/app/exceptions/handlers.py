@@ -34,4 +34,12 @@ def handle_invalid_request_error(e):
 
 @app.errorhandler(PermissionDeniedError)
 def handle_permission_denied_error(e):
-    return jsonify({"message": str(e)}), 403
\ No newline at end of file
+    return jsonify({"message": str(e)}), 403
+
+@app.errorhandler(EmbeddingWorkerError)
+def handle_embedding_worker_error(e):
+    return jsonify({"message": str(e)}), 503
+
+@app.errorhandler(IndexNotReadyError)
+def handle_index_not_ready_error(e):
+    return jsonify({"message": str(e)}), 503
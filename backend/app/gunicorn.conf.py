@@ -0,0 +1,38 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv(".env.local")
+
+preload_app = True
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(os.getenv("GUNICORN_THREADS", 32))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+
+def on_starting(server):
+    from lib.inference.embedding import preload_embedding_backend
+    from entities.article_index import article_index
+
+    preload_embedding_backend()
+    article_index.preload()
+
+
+def post_fork(server, worker):
+    from entities.job import SearchJob
+    from entities.article_index import article_index
+    from entities.company import preload_query_embeddings
+    from lib.inference.embedding import article_embedding_store, EMBEDDING_STORE_COMPACT_SECONDS
+    from lib.jobs import submit_job, run_periodically
+
+    SearchJob.resume_pending()
+    article_index.start_sync()
+    submit_job(preload_query_embeddings)
+    run_periodically(
+        article_embedding_store.compact_if_needed,
+        EMBEDDING_STORE_COMPACT_SECONDS,
+        name="embedding-store-compaction",
+    )
@@ -0,0 +1,176 @@
+from typing import Dict, List, Tuple
+import numpy as np
+import os
+import tempfile
+
+ASSIGN_BLOCK_SIZE = 8192
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.concatenate(
+        [
+            np.argmax(vectors[start : start + ASSIGN_BLOCK_SIZE] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE)
+        ]
+    ).astype(np.int32)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0):
+    generator = np.random.default_rng(seed)
+    centroids = vectors[generator.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=n_lists)
+        non_empty = counts > 0
+        centroids[non_empty] = _normalize(sums[non_empty])
+    return centroids
+
+
+class IVFFlatIndex:
+    def __init__(
+        self,
+        dimension: int,
+        nprobe: int = 8,
+        brute_force_limit: int = 4096,
+        train_sample: int = 50000,
+    ):
+        self.dimension: int = dimension
+        self.nprobe: int = nprobe
+        self.brute_force_limit: int = brute_force_limit
+        self.train_sample: int = train_sample
+        self.size: int = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._attributes: Dict[str, np.ndarray] = {}
+        self.centroids: np.ndarray = None
+        self.trained_size: int = 0
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self.size]
+
+    def attribute(self, name: str) -> np.ndarray:
+        return self._attributes[name][: self.size]
+
+    def _reserve(self, count: int):
+        capacity = len(self._ids)
+        if self.size + count <= capacity:
+            return
+
+        capacity = max(self.size + count, capacity * 2, 1024)
+        self._ids = np.resize(self._ids, capacity)
+        self._vectors = np.resize(self._vectors, (capacity, self.dimension))
+        self._assignments = np.resize(self._assignments, capacity)
+        for name, values in self._attributes.items():
+            self._attributes[name] = np.resize(values, capacity)
+
+    def add(self, ids: List[int], vectors: np.ndarray, attributes: Dict[str, List]):
+        count = len(ids)
+        if count == 0:
+            return
+
+        self._reserve(count)
+        start, stop = self.size, self.size + count
+        vectors = _normalize(vectors)
+        self._ids[start:stop] = ids
+        self._vectors[start:stop] = vectors
+        for name, values in attributes.items():
+            values = np.asarray(values)
+            current = self._attributes.get(name)
+            if current is None:
+                current = np.zeros(len(self._ids), dtype=values.dtype)
+            elif current.dtype != values.dtype:
+                current = current.astype(np.promote_types(current.dtype, values.dtype))
+            current[start:stop] = values
+            self._attributes[name] = current
+        if self.centroids is not None:
+            self._assignments[start:stop] = _assign(vectors, self.centroids)
+        self.size = stop
+
+        if self.size >= self.brute_force_limit and self.size >= 4 * self.trained_size:
+            self.train()
+
+    def train(self):
+        vectors = self._vectors[: self.size]
+        sample = vectors
+        if len(vectors) > self.train_sample:
+            generator = np.random.default_rng(0)
+            sample = vectors[generator.choice(len(vectors), self.train_sample, replace=False)]
+
+        n_lists = max(1, int(np.sqrt(self.size)))
+        self.centroids = _kmeans(sample, min(n_lists, len(sample)))
+        self._assignments[: self.size] = _assign(vectors, self.centroids)
+        self.trained_size = self.size
+
+    def search(
+        self, vector: np.ndarray, k: int = 20, mask: np.ndarray = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = _normalize(vector)
+        candidates = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+
+        if self.centroids is not None and len(candidates) > self.brute_force_limit:
+            nprobe = min(self.nprobe, len(self.centroids))
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            candidates = candidates[np.isin(self._assignments[candidates], probe)]
+
+        if len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = self._vectors[candidates] @ query
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores)
+        return self._ids[candidates[order]], scores[order]
+
+    def save(self, path: str, **extra):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            "ids": self.ids,
+            "vectors": self._vectors[: self.size],
+            "assignments": self._assignments[: self.size],
+            "trained_size": np.array(self.trained_size),
+        }
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids
+        for name in self._attributes:
+            arrays[f"attribute_{name}"] = self.attribute(name)
+        for name, value in extra.items():
+            arrays[f"extra_{name}"] = np.asarray(value)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Tuple["IVFFlatIndex", Dict[str, np.ndarray]]:
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            index = cls(vectors.shape[1], **kwargs)
+            index._ids = data["ids"].copy()
+            index._vectors = vectors.copy()
+            index._assignments = data["assignments"].copy()
+            index.size = len(index._ids)
+            index.trained_size = int(data["trained_size"])
+            if "centroids" in data:
+                index.centroids = data["centroids"].copy()
+
+            extra = {}
+            for name in data.files:
+                if name.startswith("attribute_"):
+                    index._attributes[name[len("attribute_") :]] = data[name].copy()
+                elif name.startswith("extra_"):
+                    extra[name[len("extra_") :]] = data[name]
+
+        return index, extra
@@ -0,0 +1,222 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class DiskCache:
+    def __init__(self, directory: str, ttl: float, max_bytes: int):
+        self.directory: str = directory
+        self.ttl: float = ttl
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, float]] = None
+        self._total_bytes: int = 0
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def _digest(self, key: Any) -> str:
+        encoded_key = json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded_key).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+
+        self._index = {}
+        self._total_bytes = 0
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(".json.gz"):
+                    continue
+                try:
+                    file_stat = os.stat(os.path.join(root, filename))
+                except FileNotFoundError:
+                    continue
+                digest = filename[: -len(".json.gz")]
+                self._index[digest] = {
+                    "size": file_stat.st_size,
+                    "used_at": file_stat.st_mtime,
+                }
+                self._total_bytes += file_stat.st_size
+
+    def _forget(self, digest: str):
+        entry = self._index.pop(digest, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+
+    def _evict(self):
+        for digest in sorted(self._index, key=lambda d: self._index[d]["used_at"]):
+            if self._total_bytes <= self.max_bytes:
+                return
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+            self._forget(digest)
+            self.stats["evictions"] += 1
+
+    def get(self, key: Any, allow_expired: bool = False) -> Optional[Any]:
+        digest = self._digest(key)
+        path = self._path(digest)
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+        except (FileNotFoundError, OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        if not allow_expired and time.time() - entry["stored_at"] > self.ttl:
+            with self._lock:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.stats["hits"] += 1
+            if self._index is not None and digest in self._index:
+                self._index[digest]["used_at"] = now
+
+        return entry["value"]
+
+    def set(self, key: Any, value: Any):
+        digest = self._digest(key)
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {"key": key, "stored_at": time.time(), "value": value}
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                with gzip.GzipFile(fileobj=temp_file, mode="wb") as gzip_file:
+                    gzip_file.write(json.dumps(entry, default=str).encode("utf-8"))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._load_index()
+            self._forget(digest)
+            self._index[digest] = {"size": size, "used_at": time.time()}
+            self._total_bytes += size
+            self.stats["writes"] += 1
+            self._evict()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot["bytes"] = self._total_bytes if self._index is not None else None
+            return snapshot
+
+
+class TTLCache:
+    def __init__(self, max_entries: int):
+        self.max_entries: int = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot["entries"] = len(self._entries)
+            return snapshot
+
+
+class ByteLRUCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._total_bytes: int = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[0]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._total_bytes
+            return snapshot
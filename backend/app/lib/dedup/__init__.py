@@ -0,0 +1,69 @@
+from typing import Dict, Hashable, List, Tuple
+from collections import defaultdict
+import numpy as np
+import re
+import zlib
+
+MINHASH_SEED = 1
+
+
+def shingles(text: str, size: int = 5) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = MINHASH_SEED):
+        generator = np.random.default_rng(seed)
+        max_value = np.iinfo(np.uint64).max
+        self.num_perm: int = num_perm
+        self.a: np.ndarray = generator.integers(1, max_value, num_perm, dtype=np.uint64) | 1
+        self.b: np.ndarray = generator.integers(0, max_value, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            {zlib.crc32(shingle.encode()) for shingle in shingles(text)}, dtype=np.uint64
+        )
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16):
+        self.threshold: float = threshold
+        self.bands: int = bands
+        self.rows: int = num_perm // bands
+        self.hasher = MinHasher(num_perm=self.rows * bands)
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[Tuple, List[Hashable]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple]:
+        return [
+            tuple(signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: Hashable, text: str) -> Hashable:
+        signature = self.hasher.signature(text)
+        band_keys = self._band_keys(signature)
+
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+
+        best_key, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best_key, best_similarity = candidate, similarity
+        if best_key is not None:
+            return best_key
+
+        self._signatures[key] = signature
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band][band_key].append(key)
+        return None
@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import queue
+import threading
+import time
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        func: Callable[[List[Any]], Any],
+        max_batch_size: int = 256,
+        max_latency: float = 0.005,
+        workers: int = 1,
+    ):
+        self.func = func
+        self.max_batch_size: int = max_batch_size
+        self.max_latency: float = max_latency
+        self.workers: int = workers
+        self._lock = threading.Lock()
+        self._pid: int = None
+        self._queue: queue.Queue = None
+        self._slots: threading.Semaphore = None
+        self._executor: ThreadPoolExecutor = None
+        self.stats: Dict[str, int] = {"requests": 0, "items": 0, "batches": 0}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._slots = threading.Semaphore(self.workers)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="micro-batch"
+            )
+            threading.Thread(
+                target=self._dispatch, name="micro-batch-dispatcher", daemon=True
+            ).start()
+
+    def submit(self, items: List[Any]) -> Future:
+        self._ensure_started()
+
+        future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+
+            batch: List[Tuple[List[Any], Future]] = [self._queue.get()]
+            batch_size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_latency
+            while batch_size < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                batch_size += len(request[0])
+
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[List[Any], Future]]):
+        try:
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = self.func(items)
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+
+            offset = 0
+            for request_items, future in batch:
+                future.set_result(results[offset : offset + len(request_items)])
+                offset += len(request_items)
+
+            with self._lock:
+                self.stats["requests"] += len(batch)
+                self.stats["items"] += len(items)
+                self.stats["batches"] += 1
+        finally:
+            self._slots.release()
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            snapshot = dict(self.stats)
+        snapshot["average_batch_size"] = (
+            round(snapshot["items"] / snapshot["batches"], 2) if snapshot["batches"] else 0
+        )
+        return snapshot
@@ -1,29 +1,128 @@
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Tuple
 import numpy as np
-from openai import OpenAI
 import os
 from dotenv import load_dotenv
+from lib.inference.prompt import stock_queries
+from lib.inference.embedding_backends import (
+    EMBEDDING_BACKENDS,
+    create_embedding_backend,
+    verify_embedding_backend,
+)
+from lib.inference.batching import MicroBatcher
+from lib.inference.embedding_pool import create_embedding_pool
+from lib.inference.embedding_store import EmbeddingStore
+from lib.metrics import register_metrics
+import threading
 
 load_dotenv(".env.local")
 
 OPENAI_KEY = os.getenv("OPENAI_KEY")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None
+EMBEDDING_VERIFY_TOLERANCE = float(os.getenv("EMBEDDING_VERIFY_TOLERANCE", 0.01))
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", os.path.join(".cache", "embeddings"))
+EMBEDDING_STORE_DTYPE = os.getenv("EMBEDDING_STORE_DTYPE", "float16")
+EMBEDDING_STORE_TTL_SECONDS = int(os.getenv("EMBEDDING_STORE_TTL_SECONDS", 7 * 24 * 60 * 60))
+EMBEDDING_STORE_MAX_ENTRIES = int(os.getenv("EMBEDDING_STORE_MAX_ENTRIES", 200000))
+EMBEDDING_STORE_COMPACT_SECONDS = int(os.getenv("EMBEDDING_STORE_COMPACT_SECONDS", 300))
+SUMMARY_DEDUP_MODEL = os.getenv("SUMMARY_DEDUP_MODEL", "text-embedding-ada-002")
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 256))
+EMBEDDING_BATCH_MAX_LATENCY_MS = float(os.getenv("EMBEDDING_BATCH_MAX_LATENCY_MS", 5))
+EMBEDDING_BATCH_WORKERS = int(os.getenv("EMBEDDING_BATCH_WORKERS", 1))
+EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", 0))
+EMBEDDING_POOL_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_POOL_TIMEOUT_SECONDS", 60))
+EMBEDDING_POOL_MAX_TASKS = int(os.getenv("EMBEDDING_POOL_MAX_TASKS", 0))
+EMBEDDING_POOL_MAX_RESTARTS = int(os.getenv("EMBEDDING_POOL_MAX_RESTARTS", 5))
+
+_miniLM = None
+_miniLM_pid: int = None
+_miniLM_lock = threading.Lock()
+_backend_verified: bool = EMBEDDING_BACKEND == "torch" or EMBEDDING_VERIFY_TOLERANCE <= 0
+
+
+def _verify_backend(backend):
+    global _backend_verified
+
+    if _backend_verified:
+        return
+    verify_embedding_backend(
+        backend, stock_queries("Apple Inc."), tolerance=EMBEDDING_VERIFY_TOLERANCE
+    )
+    _backend_verified = True
+
+
+def get_embedding_backend():
+    global _miniLM, _miniLM_pid
+
+    with _miniLM_lock:
+        if _miniLM is not None and (_miniLM.fork_safe or _miniLM_pid == os.getpid()):
+            return _miniLM
+
+        backend = create_embedding_backend(EMBEDDING_BACKEND, threads=EMBEDDING_THREADS)
+        _verify_backend(backend)
+
+        _miniLM = backend
+        _miniLM_pid = os.getpid()
+        return _miniLM
+
+
+def preload_embedding_backend():
+    global _miniLM, _miniLM_pid
+
+    if not _backend_verified:
+        EMBEDDING_BACKENDS[EMBEDDING_BACKEND].prepare()
+        _verify_backend(create_embedding_backend(EMBEDDING_BACKEND, threads=EMBEDDING_THREADS))
+
+    if embedding_pool is not None:
+        EMBEDDING_BACKENDS[EMBEDDING_BACKEND].prepare()
+        return
+
+    backend = EMBEDDING_BACKENDS[EMBEDDING_BACKEND].preload(threads=EMBEDDING_THREADS)
+    if backend is not None:
+        with _miniLM_lock:
+            _miniLM = backend
+            _miniLM_pid = os.getpid()
+
+
+embedding_pool = None
+if EMBEDDING_POOL_WORKERS > 0:
+    embedding_pool = create_embedding_pool(
+        EMBEDDING_BACKEND,
+        EMBEDDING_POOL_WORKERS,
+        threads=EMBEDDING_THREADS,
+        max_rows=EMBEDDING_BATCH_MAX_SIZE,
+        timeout=EMBEDDING_POOL_TIMEOUT_SECONDS,
+        max_tasks_per_worker=EMBEDDING_POOL_MAX_TASKS,
+        max_restarts=EMBEDDING_POOL_MAX_RESTARTS,
+    )
+    register_metrics("embedding_pool", embedding_pool.snapshot)
+
+embedding_batcher = MicroBatcher(
+    embedding_pool.encode
+    if embedding_pool is not None
+    else lambda texts: get_embedding_backend().encode(texts),
+    max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+    max_latency=EMBEDDING_BATCH_MAX_LATENCY_MS / 1000,
+    workers=EMBEDDING_POOL_WORKERS or EMBEDDING_BATCH_WORKERS,
+)
+register_metrics("embedding_batcher", embedding_batcher.snapshot)
 
-miniLM = SentenceTransformer(
-    "sentence-transformers/paraphrase-MiniLM-L6-v2")
 
 def embed_texts(
     texts: List[str], model: str = "sentence-transformers/paraphrase-MiniLM-L6-v2"
 ):
     embeddings = []
     if model == "sentence-transformers/paraphrase-MiniLM-L6-v2":
-        embeddings = miniLM.encode(texts, normalize_embeddings=True)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = embedding_batcher.submit(list(texts)).result()
     elif model in [
         "text-embedding-3-small",
         "text-embedding-3-large",
         "text-embedding-ada-002",
     ]:
+        from openai import OpenAI
+
         client = OpenAI(api_key=OPENAI_KEY)
         response = client.embeddings.create(input=texts, model=model)
 
@@ -32,33 +131,159 @@ def embed_texts(
     return embeddings
 
 
+article_embedding_store = EmbeddingStore(
+    os.path.join(EMBEDDING_STORE_DIR, EMBEDDING_BACKEND),
+    dtype=EMBEDDING_STORE_DTYPE,
+    ttl=EMBEDDING_STORE_TTL_SECONDS,
+    max_entries=EMBEDDING_STORE_MAX_ENTRIES,
+)
+register_metrics("embedding_store", article_embedding_store.snapshot)
+
+
+def embed_texts_cached(texts: List[str]) -> np.ndarray:
+    keys = [EmbeddingStore.key(text) for text in texts]
+    stored_embeddings = article_embedding_store.get_many(keys)
+
+    missing_texts = {}
+    for key, text in zip(keys, texts):
+        if key not in stored_embeddings:
+            missing_texts[key] = text
+    if missing_texts:
+        new_embeddings = np.asarray(embed_texts(list(missing_texts.values())), dtype=np.float32)
+        article_embedding_store.put_many(list(missing_texts), new_embeddings)
+        stored_embeddings.update(zip(missing_texts, new_embeddings))
+
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.asarray([stored_embeddings[key] for key in keys], dtype=np.float32)
+
+
+class QueryEmbeddingStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Tuple, np.ndarray]] = {}
+
+    def get(self, ticker: str, company_name: str, aliases: List[str]) -> np.ndarray:
+        fingerprint = (company_name, tuple(aliases))
+        entry = self._entries.get(ticker)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+
+        query_embeddings = np.ascontiguousarray(
+            embed_texts(stock_queries(company_name)), dtype=np.float32
+        )
+        query_embeddings.setflags(write=False)
+
+        with self._lock:
+            self._entries[ticker] = (fingerprint, query_embeddings)
+        return query_embeddings
+
+    def preload(self, companies: List[Tuple[str, str, List[str]]]):
+        pending_companies = [
+            (ticker, company_name, aliases)
+            for ticker, company_name, aliases in companies
+            if self._entries.get(ticker, (None,))[0] != (company_name, tuple(aliases))
+        ]
+        if not pending_companies:
+            return
+
+        queries_per_company = [
+            stock_queries(company_name) for _, company_name, _ in pending_companies
+        ]
+        all_query_embeddings = np.asarray(
+            embed_texts([query for queries in queries_per_company for query in queries]),
+            dtype=np.float32,
+        )
+
+        offset = 0
+        with self._lock:
+            for (ticker, company_name, aliases), queries in zip(
+                pending_companies, queries_per_company
+            ):
+                query_embeddings = np.ascontiguousarray(
+                    all_query_embeddings[offset : offset + len(queries)]
+                )
+                query_embeddings.setflags(write=False)
+                self._entries[ticker] = ((company_name, tuple(aliases)), query_embeddings)
+                offset += len(queries)
+
+    def invalidate(self, ticker: str = None):
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker, None)
+
+
+query_embedding_store = QueryEmbeddingStore()
+
+
+def score_article_relevance(
+    article_embeddings: np.ndarray, query_embeddings: np.ndarray
+) -> np.ndarray:
+    article_embeddings = np.asarray(article_embeddings, dtype=np.float32)
+    if article_embeddings.size == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    similarities = article_embeddings @ np.asarray(query_embeddings, dtype=np.float32).T
+    return similarities.max(axis=1)
+
+
 def check_article_relevance(
-    article_embedding: List[int], query_embeddings: List[List[int]]
-):
-    threshold = 0.5
-    similarities = cosine_similarity([article_embedding], query_embeddings)
-    return np.any(similarities[0] >= threshold)
+    article_embeddings: np.ndarray,
+    query_embeddings: np.ndarray,
+    threshold: float = 0.5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    scores = score_article_relevance(article_embeddings, query_embeddings)
+    return scores, scores >= threshold
 
 
-def filter_similar_texts(values, threshold=0.9):
-    embeddings = embed_texts(values, model="text-embedding-ada-002")
+def filter_similar_embeddings(
+    embeddings: np.ndarray, threshold: float = 0.9, block_size: int = 512
+) -> List[int]:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.size == 0:
+        return []
 
-    similarity_matrix = cosine_similarity(embeddings)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.clip(norms, 1e-12, None)
 
+    count = len(embeddings)
+    column_indices = np.arange(count)
+    removed = np.zeros(count, dtype=bool)
     unique_indices = []
-    used_indices = set()
-    similar_text_pairs = []
-
-    for i, value in enumerate(values):
-        if i in used_indices:
-            continue
 
-        unique_indices.append(i)
-        used_indices.add(i)
+    for start in range(0, count, block_size):
+        stop = min(start + block_size, count)
+        similar = (embeddings[start:stop] @ embeddings.T) > threshold
+        similar &= column_indices[None, :] > np.arange(start, stop)[:, None]
 
-        for j in range(i + 1, len(values)):
-            if similarity_matrix[i][j] > threshold:
-                used_indices.add(j)
-                similar_text_pairs.append((values[i], values[j], similarity_matrix[i][j]))
+        for row, i in enumerate(range(start, stop)):
+            if removed[i]:
+                continue
+            unique_indices.append(i)
+            removed |= similar[row]
 
     return unique_indices
+
+
+def filter_similar_text_groups(
+    groups: List[List[str]], threshold: float = 0.9, model: str = SUMMARY_DEDUP_MODEL
+) -> List[List[int]]:
+    all_values = [value for values in groups for value in values]
+    if not all_values:
+        return [[] for _ in groups]
+
+    all_embeddings = np.asarray(embed_texts(all_values, model=model), dtype=np.float32)
+
+    unique_indices_per_group = []
+    offset = 0
+    for values in groups:
+        unique_indices_per_group.append(
+            filter_similar_embeddings(
+                all_embeddings[offset : offset + len(values)], threshold=threshold
+            )
+        )
+        offset += len(values)
+
+    return unique_indices_per_group
@@ -0,0 +1,178 @@
+from typing import List
+import numpy as np
+import os
+import tempfile
+
+MINILM_MODEL = "sentence-transformers/paraphrase-MiniLM-L6-v2"
+MAX_SEQUENCE_LENGTH = 128
+
+
+class TorchEmbeddingBackend:
+    fork_safe = True
+
+    def __init__(self, model_name: str = MINILM_MODEL, threads: int = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+
+    @classmethod
+    def preload(cls, threads: int = None):
+        return cls(threads=threads)
+
+    @classmethod
+    def prepare(cls):
+        return None
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True
+        ).astype(np.float32)
+
+
+class OnnxEmbeddingBackend:
+    fork_safe = False
+
+    def __init__(
+        self, model_name: str = MINILM_MODEL, model_dir: str = None, threads: int = None
+    ):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_path = self._ensure_model(model_name, model_dir)
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        session_options.inter_op_num_threads = 1
+        if threads:
+            session_options.intra_op_num_threads = threads
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.session = onnxruntime.InferenceSession(
+            model_path, session_options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @classmethod
+    def preload(
+        cls, model_name: str = MINILM_MODEL, model_dir: str = None, threads: int = None
+    ):
+        cls.prepare(model_name, model_dir)
+        return None
+
+    @classmethod
+    def prepare(cls, model_name: str = MINILM_MODEL, model_dir: str = None):
+        cls._ensure_model(model_name, model_dir)
+
+    @classmethod
+    def _ensure_model(cls, model_name: str, model_dir: str = None) -> str:
+        model_dir = model_dir or os.path.join(".cache", "onnx", model_name.replace("/", "--"))
+        model_path = os.path.join(model_dir, "model-int8.onnx")
+        if not os.path.exists(model_path):
+            cls._export_quantized(model_name, model_dir, model_path)
+        return model_path
+
+    @staticmethod
+    def _export_quantized(model_name: str, model_dir: str, model_path: str):
+        import torch
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        from transformers import AutoModel, AutoTokenizer
+
+        class TokenEmbeddings(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask, token_type_ids):
+                return self.model(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    token_type_ids=token_type_ids,
+                ).last_hidden_state
+
+        os.makedirs(model_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = TokenEmbeddings(AutoModel.from_pretrained(model_name)).eval()
+        sample = tokenizer(["sample text"], return_tensors="pt")
+
+        with tempfile.TemporaryDirectory(dir=model_dir) as export_dir:
+            float_model_path = os.path.join(export_dir, "model.onnx")
+            quantized_model_path = os.path.join(export_dir, "model-int8.onnx")
+            dynamic_axes = {0: "batch", 1: "sequence"}
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                float_model_path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": dynamic_axes,
+                    "attention_mask": dynamic_axes,
+                    "token_type_ids": dynamic_axes,
+                    "last_hidden_state": dynamic_axes,
+                },
+                opset_version=14,
+            )
+            quantize_dynamic(
+                float_model_path, quantized_model_path, weight_type=QuantType.QInt8
+            )
+            os.replace(quantized_model_path, model_path)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQUENCE_LENGTH,
+                return_tensors="np",
+            )
+            model_inputs = {
+                name: value.astype(np.int64)
+                for name, value in encoded.items()
+                if name in self.input_names
+            }
+            token_embeddings = self.session.run(None, model_inputs)[0]
+
+            attention_mask = encoded["attention_mask"][..., None].astype(np.float32)
+            summed = (token_embeddings * attention_mask).sum(axis=1)
+            counts = np.clip(attention_mask.sum(axis=1), 1e-9, None)
+            batches.append(summed / counts)
+
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        embeddings = np.concatenate(batches).astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.clip(norms, 1e-12, None)
+
+
+EMBEDDING_BACKENDS = {
+    "torch": TorchEmbeddingBackend,
+    "onnx": OnnxEmbeddingBackend,
+}
+
+
+def create_embedding_backend(name: str, threads: int = None):
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name}.")
+    return EMBEDDING_BACKENDS[name](threads=threads)
+
+
+def embedding_agreement(reference: np.ndarray, candidate: np.ndarray) -> float:
+    return float(np.min(np.sum(reference * candidate, axis=1)))
+
+
+def verify_embedding_backend(candidate, texts: List[str], tolerance: float) -> float:
+    reference = TorchEmbeddingBackend().encode(texts)
+    agreement = embedding_agreement(reference, candidate.encode(texts))
+    if agreement < 1 - tolerance:
+        raise ValueError(
+            f"Embedding backend agreement {agreement:.4f} is below {1 - tolerance:.4f}."
+        )
+    return agreement
@@ -0,0 +1,244 @@
+from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import atexit
+import math
+import os
+import queue
+import threading
+import time
+from lib.inference.embedding_backends import create_embedding_backend
+from exceptions.errors import EmbeddingWorkerError
+
+RESTART_WINDOW_SECONDS = 60
+
+
+def _embedding_worker(conn, backend_name: str, threads: int):
+    backend = create_embedding_backend(backend_name, threads=threads)
+    conn.send(("ready", backend.encode(["warmup"]).shape[1]))
+
+    buffer: shared_memory.SharedMemory = None
+    try:
+        while True:
+            try:
+                command, payload = conn.recv()
+            except EOFError:
+                break
+
+            if command == "stop":
+                break
+            elif command == "buffer":
+                buffer = shared_memory.SharedMemory(name=payload)
+            elif command == "encode":
+                try:
+                    embeddings = backend.encode(payload)
+                    output = np.ndarray(embeddings.shape, dtype=np.float32, buffer=buffer.buf)
+                    output[:] = embeddings
+                    del output
+                    conn.send(("ok", len(payload)))
+                except Exception as e:
+                    conn.send(("error", repr(e)))
+    finally:
+        if buffer is not None:
+            buffer.close()
+
+
+class EmbeddingWorker:
+    def __init__(self, context, backend_name: str, threads: int, max_rows: int):
+        self.context = context
+        self.backend_name: str = backend_name
+        self.threads: int = threads
+        self.max_rows: int = max_rows
+        self.process = None
+        self.conn = None
+        self.buffer: shared_memory.SharedMemory = None
+        self.dimension: int = None
+        self.tasks: int = 0
+
+    def start(self, timeout: float):
+        self.conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_embedding_worker,
+            args=(child_conn, self.backend_name, self.threads),
+            name="embedding-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        _, self.dimension = self._receive(timeout)
+        self.buffer = shared_memory.SharedMemory(
+            create=True, size=self.max_rows * self.dimension * 4
+        )
+        self.conn.send(("buffer", self.buffer.name))
+        self.tasks = 0
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def _receive(self, timeout: float):
+        if not self.conn.poll(timeout):
+            raise EmbeddingWorkerError("Embedding worker timed out.")
+        try:
+            return self.conn.recv()
+        except EOFError:
+            raise EmbeddingWorkerError("Embedding worker exited unexpectedly.")
+
+    def encode(self, texts: List[str], timeout: float) -> np.ndarray:
+        self.conn.send(("encode", texts))
+        status, payload = self._receive(timeout)
+        self.tasks += 1
+        if status == "error":
+            raise RuntimeError(payload)
+
+        output = np.ndarray((payload, self.dimension), dtype=np.float32, buffer=self.buffer.buf)
+        embeddings = output.copy()
+        del output
+        return embeddings
+
+    def stop(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+            self.conn.close()
+        if self.process is not None:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.unlink()
+        self.process = self.conn = self.buffer = None
+
+
+class EmbeddingProcessPool:
+    def __init__(
+        self,
+        backend_name: str,
+        workers: int,
+        threads: int = None,
+        max_rows: int = 256,
+        timeout: float = 60,
+        start_timeout: float = 300,
+        max_tasks_per_worker: int = 0,
+        max_restarts: int = 5,
+    ):
+        self.backend_name: str = backend_name
+        self.workers: int = workers
+        self.threads: int = threads or max(1, (os.cpu_count() or 1) // workers)
+        self.max_rows: int = max_rows
+        self.timeout: float = timeout
+        self.start_timeout: float = start_timeout
+        self.max_tasks_per_worker: int = max_tasks_per_worker
+        self.max_restarts: int = max_restarts
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pid: int = None
+        self._workers: List[EmbeddingWorker] = []
+        self._idle: queue.Queue = None
+        self._executor: ThreadPoolExecutor = None
+        self._restarts = deque()
+        self.stats: Dict[str, int] = {"tasks": 0, "texts": 0, "failures": 0, "restarts": 0}
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            workers = [
+                EmbeddingWorker(self._context, self.backend_name, self.threads, self.max_rows)
+                for _ in range(self.workers)
+            ]
+            try:
+                for worker in workers:
+                    worker.start(self.start_timeout)
+            except Exception:
+                for worker in workers:
+                    worker.stop()
+                raise
+
+            self._workers = workers
+            self._idle = queue.Queue()
+            for worker in workers:
+                self._idle.put(worker)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="embedding-pool"
+            )
+            self._pid = os.getpid()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self._ensure_started()
+
+        chunk_size = min(self.max_rows, max(1, math.ceil(len(texts) / self.workers)))
+        chunks = [texts[start : start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        if len(chunks) == 1:
+            return self._run_chunk(chunks[0])
+        return np.concatenate(list(self._executor.map(self._run_chunk, chunks)))
+
+    def _run_chunk(self, texts: List[str], retry: bool = True) -> np.ndarray:
+        worker: EmbeddingWorker = self._idle.get()
+        try:
+            if not worker.is_alive():
+                self._restart(worker)
+            embeddings = worker.encode(texts, self.timeout)
+            if self.max_tasks_per_worker and worker.tasks >= self.max_tasks_per_worker:
+                self._restart(worker)
+        except EmbeddingWorkerError:
+            with self._lock:
+                self.stats["failures"] += 1
+            if not retry:
+                raise
+            worker.stop()
+            embeddings = None
+        finally:
+            self._idle.put(worker)
+
+        if embeddings is None:
+            return self._run_chunk(texts, retry=False)
+
+        with self._lock:
+            self.stats["tasks"] += 1
+            self.stats["texts"] += len(texts)
+        return embeddings
+
+    def _restart(self, worker: EmbeddingWorker):
+        with self._lock:
+            now = time.monotonic()
+            while self._restarts and now - self._restarts[0] > RESTART_WINDOW_SECONDS:
+                self._restarts.popleft()
+            if len(self._restarts) >= self.max_restarts:
+                raise EmbeddingWorkerError("Embedding workers are restarting too often.")
+            self._restarts.append(now)
+            self.stats["restarts"] += 1
+
+        worker.stop()
+        worker.start(self.start_timeout)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self.stats)
+        snapshot["workers"] = self.workers
+        snapshot["alive"] = sum(worker.is_alive() for worker in self._workers)
+        return snapshot
+
+    def shutdown(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            for worker in self._workers:
+                worker.stop()
+            self._executor.shutdown(wait=False)
+            self._pid = None
+            self._workers = []
+
+
+def create_embedding_pool(backend_name: str, workers: int, **kwargs) -> EmbeddingProcessPool:
+    pool = EmbeddingProcessPool(backend_name, workers, **kwargs)
+    atexit.register(pool.shutdown)
+    return pool
@@ -0,0 +1,246 @@
+from typing import Dict, List, Tuple
+from contextlib import contextmanager
+import numpy as np
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class EmbeddingStore:
+    def __init__(
+        self,
+        directory: str,
+        dtype: str = "float16",
+        ttl: int = 7 * 24 * 60 * 60,
+        max_entries: int = 200000,
+    ):
+        self.directory: str = directory
+        self.dtype = np.dtype(dtype)
+        self.ttl: int = ttl
+        self.max_entries: int = max_entries
+        self._lock = threading.Lock()
+        self._meta: Dict = None
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._index_offset: int = 0
+        self._rows: int = 0
+        self._vectors: np.ndarray = None
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+            "compactions": 0,
+        }
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _vectors_path(self, generation: int) -> str:
+        return self._path(f"vectors-{generation}.bin")
+
+    def _index_path(self, generation: int) -> str:
+        return self._path(f"index-{generation}.log")
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, meta: Dict):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._path("meta.json"))
+
+    def _refresh(self):
+        meta = self._read_meta()
+        if meta is None:
+            self._meta, self._index, self._index_offset, self._rows, self._vectors = (
+                None, {}, 0, 0, None
+            )
+            return
+
+        if self._meta is None or meta["generation"] != self._meta["generation"]:
+            self._index, self._index_offset, self._rows, self._vectors = {}, 0, 0, None
+        self._meta = meta
+
+        generation = meta["generation"]
+        try:
+            with open(self._index_path(generation), "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].decode().splitlines():
+            key, row, created_at = line.split(" ")
+            self._index[key] = (int(row), float(created_at))
+            self._rows = max(self._rows, int(row) + 1)
+        self._index_offset += complete
+
+        if self._rows and (self._vectors is None or len(self._vectors) < self._rows):
+            self._vectors = np.memmap(
+                self._vectors_path(generation),
+                dtype=self.dtype,
+                mode="r",
+                shape=(self._rows, meta["dimension"]),
+            )
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        cutoff = time.time() - self.ttl
+        found = {}
+        with self._lock:
+            self._refresh()
+            for key in keys:
+                entry = self._index.get(key)
+                if entry is None:
+                    self.stats["misses"] += 1
+                elif entry[1] < cutoff:
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["hits"] += 1
+                    found[key] = self._vectors[entry[0]]
+        return found
+
+    def put_many(self, keys: List[str], embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings)
+        if not keys or embeddings.size == 0:
+            return
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._meta is None:
+                self._meta = {
+                    "generation": 0,
+                    "dimension": embeddings.shape[1],
+                    "compacted_at": time.time(),
+                }
+                self._write_meta(self._meta)
+
+            cutoff = time.time() - self.ttl
+            pending = {}
+            for key, embedding in zip(keys, embeddings):
+                entry = self._index.get(key)
+                if entry is None or entry[1] < cutoff:
+                    pending[key] = embedding
+            if not pending:
+                return
+
+            generation = self._meta["generation"]
+            row_bytes = self._meta["dimension"] * self.dtype.itemsize
+            vectors_path = self._vectors_path(generation)
+            with open(vectors_path, "ab"):
+                pass
+            with open(vectors_path, "r+b") as f:
+                start_row = os.fstat(f.fileno()).st_size // row_bytes
+                f.seek(start_row * row_bytes)
+                f.truncate()
+                f.write(np.asarray(list(pending.values()), dtype=self.dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            created_at = time.time()
+            with open(self._index_path(generation), "a") as f:
+                f.writelines(
+                    f"{key} {start_row + i} {created_at}\n" for i, key in enumerate(pending)
+                )
+
+            self.stats["writes"] += len(pending)
+            self._refresh()
+
+    def _needs_compaction(self) -> bool:
+        if self._meta is None:
+            return False
+        cutoff = time.time() - self.ttl
+        live = sum(1 for _, created_at in self._index.values() if created_at >= cutoff)
+        return live > self.max_entries or self._rows - live > max(live, 1000)
+
+    def compact(self):
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._meta is not None:
+                self._compact()
+
+    def compact_if_needed(self) -> bool:
+        with self._lock:
+            self._refresh()
+            if not self._needs_compaction():
+                return False
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            if not self._needs_compaction():
+                return False
+            self._compact()
+            return True
+
+    def _compact(self):
+        cutoff = time.time() - self.ttl
+        live_entries = sorted(
+            (
+                (created_at, key, row)
+                for key, (row, created_at) in self._index.items()
+                if created_at >= cutoff
+            ),
+            reverse=True,
+        )[: self.max_entries]
+
+        old_generation = self._meta["generation"]
+        generation = old_generation + 1
+        rows = np.array([row for _, _, row in live_entries], dtype=np.int64)
+        with open(self._vectors_path(generation), "wb") as f:
+            for start in range(0, len(rows), 4096):
+                f.write(np.ascontiguousarray(self._vectors[rows[start : start + 4096]]).tobytes())
+        with open(self._index_path(generation), "w") as f:
+            f.writelines(
+                f"{key} {i} {created_at}\n" for i, (created_at, key, _) in enumerate(live_entries)
+            )
+
+        self.stats["evictions"] += len(self._index) - len(live_entries)
+        self.stats["compactions"] += 1
+        self._write_meta(
+            {
+                "generation": generation,
+                "dimension": self._meta["dimension"],
+                "compacted_at": time.time(),
+            }
+        )
+        for path in (self._vectors_path(old_generation), self._index_path(old_generation)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._refresh()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self.stats)
+            snapshot["entries"] = len(self._index)
+            snapshot["rows"] = self._rows
+            snapshot["bytes"] = 0 if self._vectors is None else self._vectors.nbytes
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 4) if lookups else 0
+        return snapshot
@@ -1,44 +1,183 @@
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 import aiohttp
 import asyncio
+import json
+import random
+import time
+from lib.inference.runtime import inference_runtime
 from exceptions.errors import ExternalAPITimeoutError, ExternalAPIError
 
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20
+CALL_DEADLINE_SECONDS = 90
+
+
+class RetryableResponseError(Exception):
+    def __init__(self, status: int, retry_after: Optional[float]):
+        self.status = status
+        self.retry_after = retry_after
+        super().__init__(f"Retryable response status {status}")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float]) -> float:
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _estimate_tokens(body: Dict[str, Any]) -> int:
+    return len(json.dumps(body)) // 4
+
+
+async def _post(
+    session: aiohttp.ClientSession,
+    url: str,
+    body: Dict[str, Any],
+    headers: Dict[str, str],
+    timeout: float,
+) -> Dict[str, Any]:
+    async with session.post(
+        url, json=body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        if response.status in RETRYABLE_STATUSES:
+            raise RetryableResponseError(
+                status=response.status,
+                retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+        if response.status != 200:
+            error_message = await response.text()
+            raise aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=error_message,
+                headers=response.headers,
+            )
+
+        return await response.json()
+
+
 async def call_model_api_async(
-    session: aiohttp.ClientSession, url: str, body: Dict[str, Any], headers: Dict[str, str]
+    session: aiohttp.ClientSession,
+    url: str,
+    body: Dict[str, Any],
+    headers: Dict[str, str],
+    provider: str = "default",
+    deadline: float = CALL_DEADLINE_SECONDS,
 ) -> Dict[str, Any]:
-    try:
-        async with session.post(url, json=body, headers=headers) as response:
-            if response.status != 200:
-                error_message = await response.text()
-                raise aiohttp.ClientResponseError(
-                    status=response.status,
-                    message=error_message,
-                    headers=response.headers
-                )
-
-            result = await response.json()
+    scheduler = inference_runtime.get_scheduler(provider)
+    tokens = _estimate_tokens(body)
+    expires_at = time.monotonic() + deadline
+
+    attempt = 0
+    while True:
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            scheduler.stats["failed"] += 1
+            raise ExternalAPITimeoutError("Calling external API timed out. Please try again.")
+
+        try:
+            await asyncio.wait_for(scheduler.acquire(tokens), timeout=remaining)
+        except asyncio.TimeoutError:
+            scheduler.stats["failed"] += 1
+            raise ExternalAPITimeoutError("Calling external API timed out. Please try again.")
+
+        retry_after = None
+        timed_out = False
+        try:
+            remaining = max(expires_at - time.monotonic(), 0.001)
+            result = await _post(session, url, body, headers, timeout=remaining)
+            scheduler.on_success()
             return result
 
-    except (aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
-        raise ExternalAPITimeoutError("Calling external API timed out. Please try again.")
+        except RetryableResponseError as e:
+            if e.status in THROTTLE_STATUSES:
+                scheduler.on_throttle()
+            retry_after = e.retry_after
+
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError):
+            timed_out = True
+
+        except aiohttp.ClientConnectionError:
+            pass
+
+        except Exception:
+            scheduler.stats["failed"] += 1
+            raise ExternalAPIError("Error fetching data from external API.")
+
+        finally:
+            await scheduler.release()
+
+        if attempt >= MAX_RETRIES:
+            scheduler.stats["failed"] += 1
+            if timed_out:
+                raise ExternalAPITimeoutError("Calling external API timed out. Please try again.")
+            raise ExternalAPIError("Error fetching data from external API.")
+
+        delay = _backoff_delay(attempt, retry_after)
+        if time.monotonic() + delay >= expires_at:
+            scheduler.stats["failed"] += 1
+            raise ExternalAPITimeoutError("Calling external API timed out. Please try again.")
 
-    except Exception:
-        raise ExternalAPIError("Error fetching data from external API.")
+        scheduler.stats["retries"] += 1
+        attempt += 1
+        await asyncio.sleep(delay)
 
 
 async def create_parallel_request(
     func: Callable[[aiohttp.ClientSession, Any], Any],
     data: List[Any],
-    ssl: bool = False,
+    provider: str = "default",
+    on_result: Optional[Callable[[int, Any], None]] = None,
+    **kwargs: Dict[str, Any]
+) -> List[Any]:
+    session = inference_runtime.get_session(provider)
+
+    async def run_task(index: int, item: Dict[str, Any]):
+        result = await func(session, **item, **kwargs)
+        if on_result is not None:
+            on_result(index, result)
+        return result
+
+    tasks = []
+    for index, item in enumerate(data):
+        task = run_task(index, item)
+        tasks.append(task)
+
+    results = await asyncio.gather(*tasks)
+    return results
+
+
+def run_parallel_request(
+    func: Callable[[aiohttp.ClientSession, Any], Any],
+    data: List[Any],
+    provider: str = "default",
+    on_result: Optional[Callable[[int, Any], None]] = None,
     **kwargs: Dict[str, Any]
 ) -> List[Any]:
-    timeout = aiohttp.ClientTimeout(total=30)
-    connector = aiohttp.TCPConnector(ssl=ssl, limit_per_host=30)
-    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-        tasks = []
-        for item in data:
-            task = func(session, **item, **kwargs)
-            tasks.append(task)
-
-        results = await asyncio.gather(*tasks)
-        return results
+    return inference_runtime.run(
+        create_parallel_request(
+            func=func, data=data, provider=provider, on_result=on_result, **kwargs
+        )
+    )
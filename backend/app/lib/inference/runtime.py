@@ -0,0 +1,165 @@
+from typing import Dict, Any, Awaitable, TypeVar
+from concurrent.futures import Future
+import aiohttp
+import asyncio
+import atexit
+import os
+import threading
+from dotenv import load_dotenv
+from lib.inference.scheduler import ProviderScheduler
+from lib.metrics import register_metrics
+
+load_dotenv(".env.local")
+
+T = TypeVar("T")
+
+# Provider quotas are account-wide, but each worker process schedules on its
+# own, so every process gets an equal share of the configured budget.
+INFERENCE_PROCESSES = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+PROVIDERS: Dict[str, Dict[str, Any]] = {
+    "gemini": {
+        "limit": 30,
+        "ssl": False,
+        "requests_per_minute": int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 1000)),
+        "tokens_per_minute": int(os.getenv("GEMINI_TOKENS_PER_MINUTE", 1000000)),
+    },
+    "openai": {
+        "limit": 30,
+        "ssl": False,
+        "requests_per_minute": int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 500)),
+        "tokens_per_minute": int(os.getenv("OPENAI_TOKENS_PER_MINUTE", 200000)),
+    },
+    "default": {
+        "limit": 30,
+        "ssl": False,
+        "requests_per_minute": 600,
+        "tokens_per_minute": 1000000,
+    },
+}
+
+REQUEST_TIMEOUT_SECONDS = 30
+KEEPALIVE_SECONDS = 60
+DNS_CACHE_SECONDS = 300
+
+
+class InferenceRuntime:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: int = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._thread: threading.Thread = None
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._schedulers: Dict[str, ProviderScheduler] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            self._pid = os.getpid()
+            self._sessions = {}
+            self._schedulers = {}
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="inference-runtime", daemon=True
+            )
+            self._thread.start()
+            return self._loop
+
+    def _trace_config(self, provider: str) -> aiohttp.TraceConfig:
+        stats = self._stats.setdefault(
+            provider,
+            {
+                "requests": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+                "dns_lookups": 0,
+                "dns_cache_hits": 0,
+            },
+        )
+
+        def counter(key: str):
+            async def increment(session, context, params):
+                stats[key] += 1
+
+            return increment
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_dns_resolvehost_end.append(counter("dns_lookups"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        return trace_config
+
+    def get_session(self, provider: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(provider)
+        if session is not None and not session.closed:
+            return session
+
+        config = PROVIDERS.get(provider, PROVIDERS["default"])
+        connector = aiohttp.TCPConnector(
+            ssl=config["ssl"],
+            limit_per_host=config["limit"],
+            keepalive_timeout=KEEPALIVE_SECONDS,
+            ttl_dns_cache=DNS_CACHE_SECONDS,
+        )
+        session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+            connector=connector,
+            trace_configs=[self._trace_config(provider)],
+        )
+        self._sessions[provider] = session
+        return session
+
+    def get_scheduler(self, provider: str) -> ProviderScheduler:
+        scheduler = self._schedulers.get(provider)
+        if scheduler is not None:
+            return scheduler
+
+        config = PROVIDERS.get(provider, PROVIDERS["default"])
+        scheduler = ProviderScheduler(
+            requests_per_minute=max(1, config["requests_per_minute"] // INFERENCE_PROCESSES),
+            tokens_per_minute=max(1, config["tokens_per_minute"] // INFERENCE_PROCESSES),
+            max_concurrency=config["limit"],
+        )
+        self._schedulers[provider] = scheduler
+        return scheduler
+
+    def submit(self, coro: Awaitable[T]) -> Future:
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Awaitable[T], timeout: float = None) -> T:
+        return self.submit(coro).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {provider: dict(stats) for provider, stats in self._stats.items()}
+        for provider, scheduler in self._schedulers.items():
+            stats.setdefault(provider, {})["scheduler"] = scheduler.snapshot()
+        return stats
+
+    async def _close_sessions(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions = {}
+
+    def shutdown(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+
+            asyncio.run_coroutine_threadsafe(self._close_sessions(), self._loop).result(
+                timeout=5
+            )
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+
+inference_runtime = InferenceRuntime()
+
+register_metrics("inference", inference_runtime.stats)
+atexit.register(inference_runtime.shutdown)
@@ -0,0 +1,104 @@
+from typing import Dict
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity: float = float(per_minute)
+        self.rate: float = per_minute / 60
+        self.tokens: float = float(per_minute)
+        self.updated_at: float = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderScheduler:
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency: int = max_concurrency
+        self.min_concurrency: int = min_concurrency
+        self.concurrency_limit: float = float(max_concurrency)
+        self.in_flight: int = 0
+        self.waiting: int = 0
+        self._condition = asyncio.Condition()
+        self.stats: Dict[str, int] = {
+            "completed": 0,
+            "throttled": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+
+    async def acquire(self, tokens: int):
+        acquired = False
+        self.waiting += 1
+        try:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: self.in_flight < int(self.concurrency_limit)
+                )
+                self.in_flight += 1
+                acquired = True
+
+            while True:
+                delay = max(
+                    self.request_bucket.wait_time(1),
+                    self.token_bucket.wait_time(tokens),
+                )
+                if delay == 0:
+                    self.request_bucket.take(1)
+                    self.token_bucket.take(tokens)
+                    return
+                await asyncio.sleep(delay)
+        except BaseException:
+            if acquired:
+                await self.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        self.stats["completed"] += 1
+        self.concurrency_limit = min(
+            self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit
+        )
+
+    def on_throttle(self):
+        self.stats["throttled"] += 1
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+
+    def snapshot(self) -> Dict[str, float]:
+        snapshot = dict(self.stats)
+        snapshot.update(
+            {
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+            }
+        )
+        return snapshot
@@ -7,7 +7,6 @@ from lib.inference.prompt import (
 )
 from lib.inference.external_api import call_model_api_async
 from dotenv import load_dotenv
-from openai import OpenAI
 import os
 
 load_dotenv(".env.local")
@@ -30,7 +29,9 @@ async def generate_base_summary(
     }
     headers = {"x-goog-api-key": GENAI_KEY}
 
-    inference_output = await call_model_api_async(session, url, body, headers)
+    inference_output = await call_model_api_async(
+        session, url, body, headers, provider="gemini"
+    )
 
     try:
         summary = inference_output["candidates"][0]["content"]["parts"][0]["text"]
@@ -59,7 +60,9 @@ async def compress_base_summary(
 
     headers = {"Authorization": f"Bearer {OPENAI_KEY}"}
 
-    inference_output = await call_model_api_async(session, url, body, headers)
+    inference_output = await call_model_api_async(
+        session, url, body, headers, provider="openai"
+    )
 
     try:
         json_output = json.loads(
@@ -89,7 +92,9 @@ async def generate_sentiment_summaries(
 
     headers = {"Authorization": f"Bearer {OPENAI_KEY}"}
 
-    inference_output = await call_model_api_async(session, url, body, headers)
+    inference_output = await call_model_api_async(
+        session, url, body, headers, provider="openai"
+    )
 
     try:
         json_output = json.loads(inference_output["choices"][0]["message"]["content"])
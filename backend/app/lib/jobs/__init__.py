@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Any
+from dotenv import load_dotenv
+from config import app
+from models import db
+
+load_dotenv(".env.local")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+
+executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+
+def _run_in_app_context(func: Callable[..., Any], *args, **kwargs):
+    with app.app_context():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            db.session.remove()
+
+
+def submit_job(func: Callable[..., Any], *args, **kwargs) -> Future:
+    return executor.submit(_run_in_app_context, func, *args, **kwargs)
+
+
+def run_periodically(
+    func: Callable[[], Any], interval: float, name: str, initial_delay: float = None
+) -> threading.Thread:
+    def loop():
+        time.sleep(interval if initial_delay is None else initial_delay)
+        while True:
+            try:
+                _run_in_app_context(func)
+            except Exception:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
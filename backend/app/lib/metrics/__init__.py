@@ -0,0 +1,11 @@
+from typing import Callable, Dict, Any
+
+_metric_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, source: Callable[[], Dict[str, Any]]):
+    _metric_sources[name] = source
+
+
+def collect_metrics() -> Dict[str, Any]:
+    return {name: source() for name, source in _metric_sources.items()}
@@ -1,26 +1,58 @@
 import os
-import json
 from dotenv import load_dotenv
-from newscatcherapi import NewsCatcherApiClient
+from lib.cache import DiskCache
+from lib.metrics import register_metrics
 from exceptions.errors import ExternalAPIError
 
 load_dotenv(".env.local")
 
 NEWSCATCHER_KEY = os.getenv("NEWSCATCHER_KEY")
+NEWS_CACHE_DIR = os.getenv("NEWS_CACHE_DIR", os.path.join(".cache", "news"))
+NEWS_CACHE_TTL_SECONDS = int(os.getenv("NEWS_CACHE_TTL_SECONDS", 900))
+NEWS_CACHE_MAX_BYTES = int(os.getenv("NEWS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+NEWS_CACHE_OFFLINE = os.getenv("NEWS_CACHE_OFFLINE", "false").lower() == "true"
+
+news_cache = DiskCache(
+    directory=NEWS_CACHE_DIR,
+    ttl=NEWS_CACHE_TTL_SECONDS,
+    max_bytes=NEWS_CACHE_MAX_BYTES,
+)
+register_metrics("news_cache", news_cache.snapshot)
+
+_newscatcherapi = None
+
+
+def _get_newscatcher_client():
+    global _newscatcherapi
+
+    if _newscatcherapi is None:
+        from newscatcherapi import NewsCatcherApiClient
+
+        _newscatcherapi = NewsCatcherApiClient(x_api_key=NEWSCATCHER_KEY)
+    return _newscatcherapi
 
 
 def get_news(keywords: list, days_ago: int, page: int = 1) -> dict:
+    search_query = " OR ".join(f'"{keyword}"' for keyword in keywords)
+    from_ = f"{days_ago} days ago"
+    cache_key = {"q": search_query, "from": from_, "page": page}
+
+    news_articles = news_cache.get(cache_key, allow_expired=NEWS_CACHE_OFFLINE)
+    if news_articles is not None:
+        return news_articles
+
+    if NEWS_CACHE_OFFLINE:
+        raise ExternalAPIError("News data for this query is not available offline.")
+
     try:
-        newscatcherapi = NewsCatcherApiClient(x_api_key=NEWSCATCHER_KEY)
-        search_query = " OR ".join(f'"{keyword}"' for keyword in keywords)
-        news_articles = newscatcherapi.get_search(
-            q=search_query, lang="en", from_=f"{days_ago} days ago",
+        news_articles = _get_newscatcher_client().get_search(
+            q=search_query, lang="en", from_=from_,
             to_rank=1000, page_size=100, page=page
         )
-        
-        with open("raw_news_data.json", "w", encoding="utf-8") as json_file:
-            json.dump(news_articles, json_file, indent=4)
-
-        return news_articles
     except:
-        raise ExternalAPIError("Error fetching data from external API.")
\ No newline at end of file
+        raise ExternalAPIError("Error fetching data from external API.")
+
+    if str(news_articles.get("status", "")).lower() == "ok":
+        news_cache.set(cache_key, news_articles)
+
+    return news_articles
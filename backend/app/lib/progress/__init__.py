@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from typing import Dict, List, Any, Iterator, Optional
+
+CHANNEL_TTL_SECONDS = 300
+
+
+class ProgressChannel:
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.closed: bool = False
+        self.closed_at: float = None
+        self.condition = threading.Condition()
+
+
+class ProgressBroker:
+    def __init__(self, channel_ttl: int = CHANNEL_TTL_SECONDS):
+        self.channel_ttl: int = channel_ttl
+        self._channels: Dict[str, ProgressChannel] = {}
+        self._lock = threading.Lock()
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [
+            channel_id
+            for channel_id, channel in self._channels.items()
+            if channel.closed and now - channel.closed_at > self.channel_ttl
+        ]
+        for channel_id in expired:
+            del self._channels[channel_id]
+
+    def open(self, channel_id: str) -> ProgressChannel:
+        with self._lock:
+            self._evict_expired()
+            channel = self._channels.get(channel_id)
+            if channel is None:
+                channel = ProgressChannel()
+                self._channels[channel_id] = channel
+            return channel
+
+    def get(self, channel_id: str) -> Optional[ProgressChannel]:
+        with self._lock:
+            return self._channels.get(channel_id)
+
+    def publish(self, channel_id: str, event: str, data: Dict[str, Any]):
+        channel = self.open(channel_id)
+        with channel.condition:
+            if channel.closed:
+                return
+            channel.events.append({"event": event, "data": data})
+            channel.condition.notify_all()
+
+    def close(self, channel_id: str):
+        channel = self.open(channel_id)
+        with channel.condition:
+            channel.closed = True
+            channel.closed_at = time.monotonic()
+            channel.condition.notify_all()
+
+    def subscribe(
+        self, channel_id: str, keepalive: float = 15
+    ) -> Iterator[Optional[Dict[str, Any]]]:
+        channel = self.get(channel_id)
+        if channel is None:
+            return
+
+        index = 0
+        while True:
+            with channel.condition:
+                if index >= len(channel.events) and not channel.closed:
+                    channel.condition.wait(timeout=keepalive)
+                pending = channel.events[index:]
+                closed = channel.closed
+
+            index += len(pending)
+            if not pending and not closed:
+                yield None
+            for event in pending:
+                yield event
+
+            if closed and index >= len(channel.events):
+                return
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    if event is None:
+        return ": keepalive\n\n"
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+progress_broker = ProgressBroker()
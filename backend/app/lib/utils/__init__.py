@@ -1,5 +1,7 @@
 import re
 import math
+import base64
+import json
 
 
 def clean_text(text):
@@ -30,3 +32,13 @@ def create_batches(items, max_batch_size):
         start_idx += batch_size
 
     return batches
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    padding = "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(cursor + padding))
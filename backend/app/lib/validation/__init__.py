@@ -2,16 +2,40 @@ import os
 import jwt
 from dotenv import load_dotenv
 from functools import wraps
+from typing import Callable
 from flask import request, jsonify, g
+from lib.cache import TTLCache
+from lib.metrics import register_metrics
+import hashlib
+import hmac
 import time
 
 load_dotenv(".env.local")
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 PUBLIC_SUPABASE_URL = os.getenv("PUBLIC_SUPABASE_URL")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+STREAM_TOKEN_TTL_SECONDS = int(os.getenv("STREAM_TOKEN_TTL_SECONDS", 300))
+STREAM_TOKEN_AUDIENCE = "stream"
+
+token_cache = TTLCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
+register_metrics("token_cache", token_cache.snapshot)
 
 
 def verify_jwt(token: str) -> dict:
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    decoded_token = token_cache.get(token_hash)
+    if decoded_token is not None:
+        return decoded_token
+
+    decoded_token = _decode_jwt(token)
+    if decoded_token is not None:
+        token_cache.set(token_hash, decoded_token, expires_at=decoded_token["exp"])
+    return decoded_token
+
+
+def _decode_jwt(token: str) -> dict:
     try:
         decoded_token = jwt.decode(
             token,
@@ -40,6 +64,32 @@ def verify_jwt(token: str) -> dict:
         return None
 
 
+def create_stream_token(user_id: str, resource: str) -> str:
+    return jwt.encode(
+        {
+            "sub": str(user_id),
+            "resource": resource,
+            "aud": STREAM_TOKEN_AUDIENCE,
+            "exp": int(time.time()) + STREAM_TOKEN_TTL_SECONDS,
+        },
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+def verify_stream_token(token: str, resource: str) -> dict:
+    try:
+        decoded_token = jwt.decode(
+            token, JWT_SECRET, algorithms=["HS256"], audience=STREAM_TOKEN_AUDIENCE
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+    if decoded_token.get("resource") != resource:
+        return None
+    return decoded_token
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -60,3 +110,45 @@ def token_required(f):
         return f(*args, **kwargs)
 
     return decorated
+
+
+def internal_token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not INTERNAL_API_TOKEN:
+            return jsonify({"message": "Not found."}), 404
+
+        token = None
+
+        if "Authorization" in request.headers:
+            token = request.headers["Authorization"].split(" ")[-1]
+
+        if not token or not hmac.compare_digest(token, INTERNAL_API_TOKEN):
+            return jsonify({"message": "Invalid internal token."}), 401
+
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def stream_token_required(resource: Callable[..., str]):
+    def decorator(f):
+        authenticated = token_required(f)
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            token = request.args.get("token")
+            if not token:
+                return authenticated(*args, **kwargs)
+
+            decoded_token = verify_stream_token(token, resource(**kwargs))
+            if not decoded_token:
+                return jsonify({"message": "Invalid or expired stream token."}), 401
+
+            g.user = decoded_token
+
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -2,15 +2,21 @@ from config import app
 from api.auth import auth_bp
 from api.search import search_bp
 from api.company import company_bp
+from api.metrics import metrics_bp
+from api.article import article_bp
 from models import db
+from entities.job import SearchJob
 from exceptions.handlers import errors_bp
 
 app.register_blueprint(search_bp, url_prefix="/api/search")
 app.register_blueprint(auth_bp, url_prefix="/api/auth")
 app.register_blueprint(company_bp, url_prefix="/api/company")
+app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
+app.register_blueprint(article_bp, url_prefix="/api/article")
 app.register_blueprint(errors_bp)
 
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
+        SearchJob.resume_pending()
     app.run(port=8000, debug=True)
@@ -1,7 +1,6 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, BigInteger, String, Float, UUID, JSON, ARRAY, DateTime, UniqueConstraint
-from sqlalchemy.ext.mutable import MutableList
+from sqlalchemy import Column, Integer, BigInteger, String, Float, UUID, JSON, ARRAY, DateTime, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.dialects.postgresql import ARRAY
 import uuid
 
@@ -12,7 +11,6 @@ class User(db.Model):
     id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
     email = Column(String(254), unique=True, nullable=False)
     plan = Column(String(20), nullable=False, default="Basic")
-    search_ids = Column(MutableList.as_mutable(ARRAY(UUID(as_uuid=True))), nullable=True, default=list)
     daily_search_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -22,15 +20,49 @@ class Search(db.Model):
     company_name = Column(String(80), nullable=False)
     ticker = Column(String(6), nullable=False)
     overall_summary = Column(String, nullable=True)
+    positive_summaries = Column(ARRAY(JSON), nullable=True)
+    negative_summaries = Column(ARRAY(JSON), nullable=True)
+    sources = Column(ARRAY(JSON), nullable=True)
+    score = Column(Float, nullable=False)
+    days_range = Column(Integer, nullable=False)
+    analysis_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(LargeBinary, nullable=True)
+    created_by = Column(UUID(as_uuid=True), nullable=False)
+    data_from = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_search_created_by_created_at', created_by, created_at.desc(), id.desc()),
+    )
+
+
+class Analysis(db.Model):
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    ticker = Column(String(6), nullable=False)
+    days_range = Column(Integer, nullable=False)
+    time_bucket = Column(BigInteger, nullable=False)
+    overall_summary = Column(String, nullable=True)
     positive_summaries = Column(ARRAY(JSON), nullable=False)
     negative_summaries = Column(ARRAY(JSON), nullable=False)
     sources = Column(ARRAY(JSON), nullable=False)
     score = Column(Float, nullable=False)
-    days_range = Column(Integer, nullable=False)
-    created_by = Column(UUID(as_uuid=True), nullable=False)
     data_from = Column(DateTime, nullable=False)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint('ticker', 'days_range', 'time_bucket', name='uix_ticker_days_range_time_bucket'),
+    )
+
+
+class AnalysisProgress(db.Model):
+    ticker = Column(String(6), primary_key=True, nullable=False)
+    days_range = Column(Integer, primary_key=True, nullable=False)
+    time_bucket = Column(BigInteger, primary_key=True, nullable=False)
+    stage = Column(String(30), nullable=True)
+    error_type = Column(String(50), nullable=True)
+    error = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
 
 class Article(db.Model):
     id = Column(BigInteger, primary_key=True, nullable=False, autoincrement=True)
@@ -55,3 +87,17 @@ class Company(db.Model):
     aliases = Column(ARRAY(String(80)), nullable=False)
     exchange = Column(String(10), nullable=False)
     currency = Column(String(10), nullable=False)
+
+
+class SearchJob(db.Model):
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    company_name = Column(String(80), nullable=False)
+    ticker = Column(String(6), nullable=False)
+    days_ago = Column(Integer, nullable=False)
+    status = Column(String(10), nullable=False, default="queued")
+    stage = Column(String(30), nullable=True)
+    search_id = Column(UUID(as_uuid=True), nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
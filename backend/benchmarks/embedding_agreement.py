@@ -0,0 +1,45 @@
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from lib.inference.embedding_backends import (  # noqa: E402
+    OnnxEmbeddingBackend,
+    TorchEmbeddingBackend,
+    embedding_agreement,
+)
+from lib.inference.prompt import stock_queries  # noqa: E402
+
+MIN_AGREEMENT = float(os.getenv("EMBEDDING_MIN_AGREEMENT", 0.99))
+
+SENTENCES = stock_queries("Apple Inc.") + [
+    "Apple shares rose 3% after quarterly revenue beat analyst expectations.",
+    "The company cut its full-year guidance, citing weaker demand in China.",
+    "Regulators opened an antitrust investigation into the App Store.",
+    "Microsoft announced a $10 billion investment in its cloud infrastructure.",
+    "Tesla recalled 120,000 vehicles over a seat belt warning defect.",
+    "The central bank held interest rates steady for the third consecutive meeting.",
+    "Nvidia's data center revenue doubled year over year on AI chip demand.",
+    "Amazon will lay off 9,000 employees across its cloud and advertising units.",
+    "Oil prices fell sharply as OPEC signaled higher production next quarter.",
+    "A short seller report accused the firm of inflating its subscriber numbers.",
+    "Q3",
+    "",
+    " ".join(["Long filings are truncated to the maximum sequence length."] * 40),
+]
+
+
+def measure_agreement():
+    reference = TorchEmbeddingBackend().encode(SENTENCES)
+    candidate = OnnxEmbeddingBackend().encode(SENTENCES)
+    return embedding_agreement(reference, candidate)
+
+
+if __name__ == "__main__":
+    agreement = measure_agreement()
+    print(
+        f"onnx int8 vs torch: min cosine {agreement:.4f} over {len(SENTENCES)} sentences "
+        f"(required {MIN_AGREEMENT:.2f})"
+    )
+    sys.exit(0 if agreement >= MIN_AGREEMENT else 1)
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", 3))
+HEAVY_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "sklearn",
+    "openai",
+    "newscatcherapi",
+    "supabase",
+]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure_import(runs: int = 3):
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URI", "sqlite://")
+
+    timings = []
+    loaded_modules = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            cwd=APP_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        measurement = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(measurement["elapsed"])
+        loaded_modules.update(measurement["loaded"])
+
+    return min(timings), sorted(loaded_modules)
+
+
+if __name__ == "__main__":
+    best, loaded_modules = measure_import()
+    print(f"import main: {best:.3f}s (best of 3, budget {IMPORT_BUDGET_SECONDS:.1f}s)")
+
+    failed = False
+    if loaded_modules:
+        print(f"heavy modules imported eagerly: {', '.join(loaded_modules)}")
+        failed = True
+    if best > IMPORT_BUDGET_SECONDS:
+        print("import time is over budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
@@ -7,10 +7,11 @@ const apiUrl = process.env.NEXT_PUBLIC_BASE_URL!;
 
 export const fetchSearchHistory = async (
   accessToken: string,
-  pageNumber?: number
+  cursor?: string | null
 ): Promise<SearchHistoryData> => {
   try {
-    const response = await axios.get(`${apiUrl}/api/search/search_history?page=${pageNumber}`, {
+    const response = await axios.get(`${apiUrl}/api/search/search_history`, {
+      params: cursor ? { cursor } : {},
       headers: {
         Authorization: `Bearer ${accessToken}`,
       }
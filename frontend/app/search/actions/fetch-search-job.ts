@@ -0,0 +1,27 @@
+"use server";
+
+import axios from "axios";
+import { SearchJob } from "@/types";
+
+const apiUrl = process.env.NEXT_PUBLIC_BASE_URL!;
+
+export const fetchSearchJob = async (
+  job_id: string,
+  accessToken: string
+): Promise<SearchJob> => {
+  try {
+    const response = await axios.get(`${apiUrl}/api/search/job/${job_id}`, {
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+      },
+    });
+
+    return response.data;
+  } catch (err: any) {
+    if (err.response && err.response.data && err.response.data.message) {
+      throw new Error(err.response.data.message);
+    } else {
+      throw new Error("An unexpected error occurred");
+    }
+  }
+};
@@ -1,7 +1,7 @@
 "use server";
 
 import axios from "axios";
-import { SearchItem } from "@/types";
+import { SearchJob } from "@/types";
 
 const apiUrl = process.env.NEXT_PUBLIC_BASE_URL!;
 
@@ -9,7 +9,7 @@ export const searchCompany = async (
   ticker: string,
   days_ago: number,
   accessToken: string
-): Promise<SearchItem> => {
+): Promise<SearchJob> => {
   try {
     const response = await axios.post(
       `${apiUrl}/api/search/search_company`,
@@ -4,28 +4,42 @@ import { Spinner } from "@/components/ui/spinner";
 
 interface LoadingProps {
   loading: boolean;
+  stage?: string | null;
 }
 
 const totalSteps = 2;
 
-export function Loading({ loading }: LoadingProps) {
+const stageLabels: Record<string, string> = {
+  fetching_articles: "Fetching relevant sources",
+  summarizing_articles: "Summarizing articles",
+  generating_summaries: "Performing analysis",
+  saving_search: "Saving results",
+};
+
+export function Loading({ loading, stage }: LoadingProps) {
   const [currentStep, setCurrentStep] = useState<number>(1);
 
   useEffect(() => {
-    if (loading && currentStep < totalSteps) {
+    if (loading && !stage && currentStep < totalSteps) {
       const timeout = setTimeout(() => {
         setCurrentStep((prevStep) => prevStep + 1);
       }, 5000);
 
       return () => clearTimeout(timeout);
     }
-  }, [loading, currentStep]);
+  }, [loading, stage, currentStep]);
 
   return (
     <div className="flex flex-col gap-2 min-h-screen items-center justify-center flex-1">
       <Spinner className={cn("size-24")} strokeWidth={0.6}></Spinner>
-      {currentStep === 1 && <p className="text-2xl ellipsis">Fetching relevant sources</p>}
-      {currentStep === 2 && <p className="text-2xl ellipsis">Performing analysis</p>}
+      {stage && stageLabels[stage] ? (
+        <p className="text-2xl ellipsis">{stageLabels[stage]}</p>
+      ) : (
+        <>
+          {currentStep === 1 && <p className="text-2xl ellipsis">Fetching relevant sources</p>}
+          {currentStep === 2 && <p className="text-2xl ellipsis">Performing analysis</p>}
+        </>
+      )}
       <p>Please hang tight. This process can take up to 30 seconds.</p>
     </div>
   );
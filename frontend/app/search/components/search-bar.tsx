@@ -1,7 +1,7 @@
 "use client";
 
 import React, { useState, useEffect } from "react";
-import { CompanyPartial, SearchItem } from "@/types";
+import { CompanyPartial, SearchItem, SearchJob } from "@/types";
 import { cn } from "@/lib/utils";
 import { Input } from "@/components/ui/input";
 import Image from "next/image";
@@ -11,13 +11,69 @@ import { useUserSession } from "@/context/user-session-context";
 import { useSearchHistory } from "@/context/search-history-context";
 import { DaysSelect } from "./days-select";
 import { searchCompany } from "../actions/search-company";
+import { fetchSearchJob } from "../actions/fetch-search-job";
 import { useToast } from "@/components/ui/use-toast";
 
+const apiUrl = process.env.NEXT_PUBLIC_BASE_URL!;
+const jobPollInterval = 1500;
+
+const pollSearchJob = async (
+  job: SearchJob,
+  accessToken: string
+): Promise<SearchJob> => {
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, jobPollInterval));
+    job = await fetchSearchJob(job.job_id, accessToken);
+  }
+
+  if (job.status === "failed") {
+    throw new Error(job.error || "An unexpected error occurred");
+  }
+
+  return job;
+};
+
+const waitForSearchJob = (
+  job: SearchJob,
+  accessToken: string,
+  setStage: (stage: string | null) => void
+): Promise<SearchJob> => {
+  if (!job.events_url) {
+    return pollSearchJob(job, accessToken);
+  }
+
+  return new Promise((resolve, reject) => {
+    const events = new EventSource(`${apiUrl}${job.events_url}`);
+
+    events.addEventListener("stage", (e) => {
+      setStage(JSON.parse((e as MessageEvent).data).stage);
+    });
+    events.addEventListener("done", () => {
+      events.close();
+      fetchSearchJob(job.job_id, accessToken).then(resolve, reject);
+    });
+    events.addEventListener("failed", (e) => {
+      events.close();
+      reject(
+        new Error(
+          JSON.parse((e as MessageEvent).data).error ||
+            "An unexpected error occurred"
+        )
+      );
+    });
+    events.onerror = () => {
+      events.close();
+      pollSearchJob(job, accessToken).then(resolve, reject);
+    };
+  });
+};
+
 interface SearchBarProps {
   setLoading: (loading: boolean) => void;
+  setStage: (stage: string | null) => void;
 }
 
-export function SearchBar({ setLoading }: SearchBarProps) {
+export function SearchBar({ setLoading, setStage }: SearchBarProps) {
   const { session } = useUserSession();
   const { companies } = useCompanies();
   const { searchHistory, setSearchHistory } = useSearchHistory();
@@ -68,14 +124,26 @@ export function SearchBar({ setLoading }: SearchBarProps) {
     } else {
       if (session?.access_token) {
         try {
+          setStage(null);
           setLoading(true);
-          const response = await searchCompany(
+          const job = await searchCompany(
             ticker,
             daysAgo,
             session.access_token
           );
+          const response = await waitForSearchJob(
+            job,
+            session.access_token,
+            setStage
+          );
 
-          const newSearchHistoryEntry: SearchItem = response;
+          const newSearchHistoryEntry: SearchItem = {
+            search_id: response.search_id!,
+            company_name: response.company_name,
+            ticker: response.ticker,
+            href: response.href!,
+            created_at: response.updated_at,
+          };
           setSearchHistory({ ...searchHistory, searches: [newSearchHistoryEntry, ...searchHistory.searches] });
 
           router.push(`/search/${response.search_id}`);
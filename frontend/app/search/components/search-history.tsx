@@ -18,7 +18,7 @@ import { fetchSearchHistory } from "../actions/fetch-search-history";
 export function SearchHistoryContent() {
   const pathname = usePathname();
   const { session } = useUserSession();
-  const { searchHistory, setSearchHistory, pageNumber, setPageNumber } = useSearchHistory();
+  const { searchHistory, setSearchHistory } = useSearchHistory();
   const [loadingMore, setLoadingMore] = useState<boolean>(false);
 
   if (!session) {
@@ -30,13 +30,13 @@ export function SearchHistoryContent() {
       setLoadingMore(true);
 
       setTimeout(async () => {
-        const data = await fetchSearchHistory(session.access_token, pageNumber);
+        const data = await fetchSearchHistory(session.access_token, searchHistory.next_cursor);
         setSearchHistory({
           label: data.label,
           searches: [...searchHistory.searches, ...data.searches],
           has_more: data.has_more,
+          next_cursor: data.next_cursor,
         });
-        setPageNumber(pageNumber + 1);
         setLoadingMore(false);
       }, 500);
     }
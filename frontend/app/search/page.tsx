@@ -6,16 +6,17 @@ import { Loading } from "./components/loading";
 
 export default function SearchPage() {
   const [loading, setLoading] = useState<boolean>(false);
+  const [stage, setStage] = useState<string | null>(null);
 
   if (loading) {
     return (
-      <Loading loading={loading} />
+      <Loading loading={loading} stage={stage} />
     );
   }
 
   return (
     <div className="flex justify-center items-center min-h-screen">
-      <SearchBar setLoading={setLoading}></SearchBar>
+      <SearchBar setLoading={setLoading} setStage={setStage}></SearchBar>
     </div>
   );
 }
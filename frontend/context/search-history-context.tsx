@@ -4,8 +4,6 @@ import { SearchHistoryData } from '@/types';
 interface SearchHistoryContextType {
   searchHistory: SearchHistoryData;
   setSearchHistory: (searchHistory: SearchHistoryData) => void;
-  pageNumber: number;
-  setPageNumber: (pageNumber: number) => void;
 }
 
 const SearchHistoryContext = createContext<SearchHistoryContextType | undefined>(undefined);
@@ -26,12 +24,12 @@ export const SearchHistoryProvider = ({ children }: SearchHistoryProviderProps)
   const [searchHistory, setSearchHistory] = useState<SearchHistoryData>({
     label: '',
     searches: [],
-    has_more: true
+    has_more: true,
+    next_cursor: null
   });
-  const [pageNumber, setPageNumber] = useState<number>(1);
 
   return (
-    <SearchHistoryContext.Provider value={{ searchHistory, setSearchHistory, pageNumber, setPageNumber }}>
+    <SearchHistoryContext.Provider value={{ searchHistory, setSearchHistory }}>
       {children}
     </SearchHistoryContext.Provider>
   );
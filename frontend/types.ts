@@ -6,10 +6,26 @@ export type SearchItem = {
   created_at: string;
 };
 
+export type SearchJob = {
+  job_id: string;
+  company_name: string;
+  ticker: string;
+  days_ago: number;
+  status: "queued" | "running" | "done" | "failed";
+  stage: string | null;
+  search_id: string | null;
+  href: string | null;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+  events_url?: string;
+};
+
 export type SearchHistoryData = {
   label: string;
   searches: SearchItem[];
   has_more: boolean;
+  next_cursor: string | null;
 };
 
 export type UserAuthData = {
@@ -38,15 +54,19 @@ export type CompanyFull = {
   currency: string;
 };
 
-export type Article = {
+export type ArticleSource = {
   clean_url: string;
-  compressed_summary: string;
   media: string;
   published_date: Date;
   title: string;
   url: string;
 };
 
+export type Article = ArticleSource & {
+  compressed_summary: string;
+  duplicates?: ArticleSource[];
+};
+
 export type AnalysisData = {
   negative_summaries: {
     value: string;